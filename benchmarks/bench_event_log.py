@@ -0,0 +1,62 @@
+"""Compare event log throughput with and without group commit.
+
+Several threads append events at once, as concurrent sessions do when they
+vote or change their status.
+
+Run with `uv run python -m benchmarks.bench_event_log`.
+"""
+
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from lecture_feedback.event_log import EventLog, FsyncPolicy
+
+WRITER_COUNT = 8
+EVENTS_PER_WRITER = 500
+
+
+def measure(path: Path, fsync_policy: FsyncPolicy, *, batching: bool) -> float:
+    """Events per second until all of them are written."""
+    event_log = EventLog(path, fsync_policy, batching=batching)
+
+    def append_events(writer_index: int) -> None:
+        for index in range(EVENTS_PER_WRITER):
+            event_log.append(
+                "upvote_question",
+                room_id="room-id",
+                session_id=f"user-{writer_index}",
+                question_id=f"question-{index}",
+            )
+
+    threads = [
+        threading.Thread(target=append_events, args=(writer_index,))
+        for writer_index in range(WRITER_COUNT)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    event_log.flush()
+    duration = time.perf_counter() - start
+    event_log.close()
+    return WRITER_COUNT * EVENTS_PER_WRITER / duration
+
+
+def main() -> None:
+    print(f"{WRITER_COUNT} writers, {EVENTS_PER_WRITER} events each")
+    with tempfile.TemporaryDirectory() as directory:
+        for fsync_policy in FsyncPolicy:
+            for batching in [False, True]:
+                path = Path(directory) / f"{fsync_policy.value}-{batching}.jsonl"
+                events_per_second = measure(path, fsync_policy, batching=batching)
+                print(
+                    f"fsync {fsync_policy.value:8} batching {batching!s:5}: "
+                    f"{events_per_second:10.0f} events/s",
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Measure the memory of a room with many participants voting on questions.
+
+Every participant reports a status, and every question is upvoted by all
+participants, so the voter storage dominates for large rooms.
+
+Run with `uv run python -m benchmarks.bench_room_memory`.
+"""
+
+import sys
+import tracemalloc
+import uuid
+
+from lecture_feedback.room import Room
+from lecture_feedback.user_status import UserStatus
+
+PARTICIPANT_COUNT = 5000
+QUESTION_COUNT = 20
+
+
+def build_room(session_ids: list[str]) -> Room:
+    room = Room("room-id", "host-id")
+    for session_id in session_ids:
+        room.add_session(session_id)
+        room.set_session_status(session_id, UserStatus.GREEN)
+    for index in range(QUESTION_COUNT):
+        room.add_question(session_ids[index], f"Question {index}")
+    for question in room.get_open_questions():
+        for session_id in session_ids:
+            room.upvote_question(session_id, question.id)
+    return room
+
+
+def main() -> None:
+    session_ids = [str(uuid.uuid4()) for _ in range(PARTICIPANT_COUNT)]
+
+    tracemalloc.start()
+    room = build_room(session_ids)
+    room_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    question = room.get_open_questions()[0]
+    voter_set = frozenset(session_ids)
+    print(f"{PARTICIPANT_COUNT} participants, {QUESTION_COUNT} questions")
+    print(f"room:                     {room_bytes / 1024:10.1f} KiB")
+    print(f"per participant:          {room_bytes / PARTICIPANT_COUNT:10.1f} B")
+    print(f"voters of one question:   {sys.getsizeof(question.voters):10d} B")
+    print(
+        f"same voters as a set:     {sys.getsizeof(voter_set):10d} B "
+        "(without the strings)",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare the session stores of a room.
+
+The dict store keeps one `UserSession` per participant, counts the statuses
+on every change and finds expired sessions with an `ExpiryQueue`. The
+columnar store keeps the statuses and last seen times in NumPy arrays,
+expires with one vectorised comparison and counts with one `bincount`.
+
+Every round, all participants but those who left send a heartbeat, a few
+change their status, the sessions of those who left a while ago expire, and
+the statuses are counted once for the shared snapshot of the room.
+
+Run with `uv run python -m benchmarks.bench_session_store`.
+"""
+
+import time
+import tracemalloc
+from collections.abc import Callable
+from unittest import mock
+
+from lecture_feedback.columnar_sessions import ColumnarSessionStore
+from lecture_feedback.room import Room
+from lecture_feedback.session_store import DictSessionStore, SessionStore
+from lecture_feedback.user_status import UserStatus
+
+PARTICIPANT_COUNTS = (100, 1_000, 10_000)
+ROUNDS = 20
+TIMEOUT_SECONDS = 60
+# simulated time between rounds, participants time out after four rounds
+ROUND_SECONDS = 15
+STATUSES = tuple(UserStatus)
+STORES: dict[str, Callable[[], SessionStore]] = {
+    "dict": DictSessionStore,
+    "columnar": ColumnarSessionStore,
+}
+
+
+class SimulatedClock:
+    def __init__(self) -> None:
+        self._now = time.time()
+
+    def __call__(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        self._now += seconds
+
+
+clock = SimulatedClock()
+
+
+def build_room(store: SessionStore, participant_count: int) -> Room:
+    room = Room("room-id", "host-id", session_store=store)
+    for index in range(participant_count):
+        room.add_session(f"user-{index}")
+        room.set_session_status(f"user-{index}", STATUSES[index % len(STATUSES)])
+    return room
+
+
+def run_rounds(store: SessionStore, participant_count: int) -> dict[str, float]:
+    """Seconds spent per round in each kind of operation."""
+    room = build_room(store, participant_count)
+    session_ids = [f"user-{index}" for index in range(participant_count)]
+    changes = max(1, participant_count // 20)
+    timings = dict.fromkeys(("heartbeats", "status changes", "expiry", "counts"), 0.0)
+
+    def measure(operation: str, run: Callable[[], object]) -> None:
+        start = time.perf_counter()
+        run()
+        timings[operation] += time.perf_counter() - start
+
+    for round_index in range(ROUNDS):
+        clock.advance(ROUND_SECONDS)
+        # one more participant leaves every round and stops sending heartbeats
+        active = session_ids[: participant_count - round_index - 1]
+        status = STATUSES[round_index % len(STATUSES)]
+
+        def send_heartbeats(active: list[str] = active) -> None:
+            for session_id in active:
+                room.update_session(session_id)
+
+        def change_statuses(
+            active: list[str] = active,
+            status: UserStatus = status,
+        ) -> None:
+            for session_id in active[:changes]:
+                room.set_session_status(session_id, status)
+
+        measure("heartbeats", send_heartbeats)
+        measure("status changes", change_statuses)
+        measure("expiry", lambda: room.remove_inactive_sessions(TIMEOUT_SECONDS))
+        measure("counts", room.status_counts)
+    return {operation: seconds / ROUNDS for operation, seconds in timings.items()}
+
+
+def measure_memory(store_factory: Callable[[], SessionStore], count: int) -> int:
+    tracemalloc.start()
+    store = store_factory()
+    for index in range(count):
+        store.set_status(f"user-{index}", UserStatus.GREEN, clock())
+    store_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store_bytes
+
+
+def report() -> None:
+    print(f"milliseconds per round, average of {ROUNDS} rounds")
+    for participant_count in PARTICIPANT_COUNTS:
+        print(f"\n{participant_count} participants")
+        for name, store_factory in STORES.items():
+            timings = run_rounds(store_factory(), participant_count)
+            memory_kib = measure_memory(store_factory, participant_count) / 1024
+            print(
+                f"  {name:>8}: "
+                + "  ".join(
+                    f"{operation} {seconds * 1000:7.3f}"
+                    for operation, seconds in timings.items()
+                )
+                + f"  memory {memory_kib:6.0f} KiB",
+            )
+
+
+def main() -> None:
+    with mock.patch("time.time", clock):
+        report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measure writing and restoring snapshots of many rooms.
+
+Every room has a few participants with a status and a few voted questions, as
+a redeploy in the middle of the lectures would find them.
+
+Run with `uv run python -m benchmarks.bench_snapshot_restore`.
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from lecture_feedback.application_state import ApplicationState
+from lecture_feedback.snapshot_log import SnapshotLog
+from lecture_feedback.user_status import UserStatus
+
+ROOM_COUNT = 10_000
+PARTICIPANTS_PER_ROOM = 20
+QUESTIONS_PER_ROOM = 3
+
+
+def build_state() -> ApplicationState:
+    application_state = ApplicationState()
+    statuses = list(UserStatus)
+    for room_index in range(ROOM_COUNT):
+        room_id = f"room-{room_index}"
+        application_state.create_room(room_id, f"host-{room_index}")
+        room = application_state.rooms[room_id]
+        session_ids = [
+            f"user-{room_index}-{index}" for index in range(PARTICIPANTS_PER_ROOM)
+        ]
+        for index, session_id in enumerate(session_ids):
+            application_state.join_room(room_id, session_id)
+            room.set_session_status(session_id, statuses[index % len(statuses)])
+        for index in range(QUESTIONS_PER_ROOM):
+            room.add_question(session_ids[index], f"Question {index}")
+        for question in room.get_open_questions():
+            for session_id in session_ids[::2]:
+                room.upvote_question(session_id, question.id)
+    return application_state
+
+
+def main() -> None:
+    application_state = build_state()
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "snapshot.jsonl"
+
+        start = time.perf_counter()
+        SnapshotLog(path).write(application_state)
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        SnapshotLog(path).restore(ApplicationState())
+        restore_seconds = time.perf_counter() - start
+
+        size_mib = path.stat().st_size / 2**20
+
+    print(
+        f"{ROOM_COUNT} rooms, {PARTICIPANTS_PER_ROOM} participants and "
+        f"{QUESTIONS_PER_ROOM} questions each",
+    )
+    print(f"snapshot size:  {size_mib:8.1f} MiB")
+    print(f"full write:     {write_seconds * 1000:8.0f} ms")
+    print(f"restore:        {restore_seconds * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Compare earlier statistics rendering approaches with the current one.
+
+Run with `uv run python -m benchmarks.bench_statistics`.
+"""
+
+import functools
+import subprocess
+import sys
+import timeit
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from lecture_feedback.app import get_statistics, statistics_figure
+from lecture_feedback.qr_code import QrCodeCache
+from lecture_feedback.room import Room
+from lecture_feedback.state_provider import RoomState
+from lecture_feedback.user_status import UserStatus
+
+PARTICIPANT_COUNT = 300
+RENDER_REPETITIONS = 200
+
+
+def legacy_render(room: RoomState) -> None:
+    """Statistics and figure as built before pandas was dropped."""
+    counts = {status.value: count for status, count in room.get_status_counts().items()}
+    df = pd.DataFrame([counts])
+    column_order = [
+        UserStatus.UNKNOWN.value,
+        UserStatus.RED.value,
+        UserStatus.YELLOW.value,
+        UserStatus.GREEN.value,
+    ]
+    df = df[[col for col in column_order if col in df.columns]]
+    if df.sum().sum() == 0:
+        return
+    fig = px.bar(df, x=df.index, y=df.columns)
+    fig.update_layout(showlegend=False, height=250)
+    fig.update_traces(marker_cornerradius=8)
+    df.sum().sum()
+    fig.to_dict()  # what st.plotly_chart does with the figure
+
+
+def fresh_figure_render(room: RoomState) -> None:
+    """Statistics as plain dict, but a new figure is built on every render."""
+    statistics = get_statistics(room)
+    if sum(statistics.values()) == 0:
+        return
+    fig = go.Figure(
+        data=[
+            go.Bar(x=[0], y=[count], name=status.value)
+            for status, count in statistics.items()
+        ],
+    )
+    fig.update_layout(barmode="relative", showlegend=False, height=250)
+    fig.update_traces(marker_cornerradius=8)
+    fig.to_dict()
+
+
+def current_render(room: RoomState) -> None:
+    statistics = get_statistics(room)
+    if sum(statistics.values()) == 0:
+        return
+    statistics_figure(statistics).to_dict()
+
+
+def import_times_microseconds(module: str) -> dict[str, int]:
+    """Cumulative import time of every module pulled in by importing `module`."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and not line.endswith("package"):
+            _, cumulative, name = line.split("|")
+            import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+def main() -> None:
+    room = Room("room-id", "host-id")
+    statuses = list(UserStatus)
+    for index in range(PARTICIPANT_COUNT):
+        room.add_session(f"user-{index}")
+        room.set_session_status(f"user-{index}", statuses[index % len(statuses)])
+    room_state = RoomState(room, "host-id", QrCodeCache())
+
+    for name, render in (
+        ("pandas", legacy_render),
+        ("fresh", fresh_figure_render),
+        ("current", current_render),
+    ):
+        render(room_state)  # warm up caches of plotly's validators
+        seconds = timeit.timeit(
+            functools.partial(render, room_state),
+            number=RENDER_REPETITIONS,
+        )
+        print(f"{name:>8} render: {seconds / RENDER_REPETITIONS * 1e3:.3f} ms")
+
+    pandas_import_times = import_times_microseconds("pandas")
+    app_import_times = import_times_microseconds("lecture_feedback.app")
+    print(f"import pandas: {pandas_import_times['pandas'] / 1e3:.0f} ms")
+    print(
+        f"import lecture_feedback.app: "
+        f"{app_import_times['lecture_feedback.app'] / 1e3:.0f} ms "
+        f"(pulls in pandas: {'pandas' in app_import_times})",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare ThreadSafeDict and CopyOnWriteDict under a mixed reader/writer load.
+
+Readers look up single keys and iterate over all values, as the room registry
+is used on every rerun. Writers add and remove keys, as rooms come and go.
+
+Run with `uv run python -m benchmarks.bench_thread_safe_dict`.
+"""
+
+import itertools
+import threading
+import time
+
+from lecture_feedback.thread_safe_dict import CopyOnWriteDict, ThreadSafeDict
+
+ENTRY_COUNT = 300
+READER_COUNT = 8
+WRITER_COUNT = 1
+DURATION_SECONDS = 2.0
+
+
+def run_load(
+    dict_class: type[ThreadSafeDict[int] | CopyOnWriteDict[int]],
+) -> tuple[int, int]:
+    shared = dict_class({f"key-{index}": index for index in range(ENTRY_COUNT)})
+    stop_event = threading.Event()
+    read_counts = [0] * READER_COUNT
+    write_counts = [0] * WRITER_COUNT
+
+    def read(reader_index: int) -> None:
+        keys = itertools.cycle([f"key-{index}" for index in range(ENTRY_COUNT)])
+        while not stop_event.is_set():
+            shared.get(next(keys))
+            sum(shared.values())
+            read_counts[reader_index] += 1
+
+    def write(writer_index: int) -> None:
+        key = f"writer-{writer_index}"
+        while not stop_event.is_set():
+            shared[key] = writer_index
+            del shared[key]
+            write_counts[writer_index] += 2
+
+    threads = [
+        *(threading.Thread(target=read, args=(i,)) for i in range(READER_COUNT)),
+        *(threading.Thread(target=write, args=(i,)) for i in range(WRITER_COUNT)),
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION_SECONDS)
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    return sum(read_counts), sum(write_counts)
+
+
+def main() -> None:
+    print(
+        f"{ENTRY_COUNT} entries, {READER_COUNT} readers, {WRITER_COUNT} writers, "
+        f"{DURATION_SECONDS}s",
+    )
+    dict_classes: list[type[ThreadSafeDict[int] | CopyOnWriteDict[int]]] = [
+        ThreadSafeDict,
+        CopyOnWriteDict,
+    ]
+    for dict_class in dict_classes:
+        reads, writes = run_load(dict_class)
+        print(
+            f"{dict_class.__name__:>16}: "
+            f"{reads / DURATION_SECONDS:>10.0f} reads/s "
+            f"{writes / DURATION_SECONDS:>10.0f} writes/s",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Start several app workers and send everyone to the worker owning their room.
+
+Each worker is an independent Streamlit process with its own rooms. The router
+only redirects the first request of a visitor, afterwards the browser talks to
+the worker directly.
+
+Run with `uv run python router.py --workers 4`.
+"""
+
+import argparse
+import os
+import secrets
+import signal
+import subprocess
+import sys
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lecture_feedback.identity import SECRET_VARIABLE
+from lecture_feedback.workers import (
+    PUBLIC_URL_VARIABLE,
+    WORKER_COUNT_VARIABLE,
+    WORKER_ID_VARIABLE,
+    WorkerRouter,
+)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="localhost", help="address to bind to")
+    parser.add_argument(
+        "--public-host",
+        help="host name that browsers reach the router and workers by, e.g. the"
+        " machine's address in the lecture hall network (default: --host)",
+    )
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--first-worker-port", type=int, default=8511)
+    return parser.parse_args()
+
+
+def start_worker(
+    worker_index: int,
+    worker_count: int,
+    port: int,
+    public_url: str,
+    secret: str,
+) -> subprocess.Popen[bytes]:
+    environment = {
+        **os.environ,
+        WORKER_ID_VARIABLE: str(worker_index),
+        # lets workers send joins of rooms they don't own to the router
+        WORKER_COUNT_VARIABLE: str(worker_count),
+        PUBLIC_URL_VARIABLE: public_url,
+        # cookies don't distinguish ports, so all workers must trust each other's
+        SECRET_VARIABLE: secret,
+    }
+    return subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "streamlit",
+            "run",
+            "main.py",
+            "--server.port",
+            str(port),
+            "--server.headless",
+            "true",
+        ],
+        env=environment,
+    )
+
+
+def main() -> None:
+    arguments = parse_arguments()
+    # the bind address, e.g. 0.0.0.0, is not necessarily reachable by browsers
+    public_host = arguments.public_host or arguments.host
+    public_url = f"http://{public_host}:{arguments.port}/"
+    worker_ports = [
+        arguments.first_worker_port + worker_index
+        for worker_index in range(arguments.workers)
+    ]
+    router = WorkerRouter([f"http://{public_host}:{port}" for port in worker_ports])
+
+    class RedirectHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            self.send_response(HTTPStatus.TEMPORARY_REDIRECT)
+            self.send_header("Location", router.route(self.path))
+            self.end_headers()
+
+    secret = os.environ.get(SECRET_VARIABLE) or secrets.token_hex(32)
+    workers = [
+        start_worker(worker_index, len(worker_ports), port, public_url, secret)
+        for worker_index, port in enumerate(worker_ports)
+    ]
+    server = ThreadingHTTPServer((arguments.host, arguments.port), RedirectHandler)
+    print(f"Routing {public_url} to {len(workers)} workers")  # noqa: T201
+    # stop the workers as well when the router itself is terminated
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
-import io
+from __future__ import annotations
+
+import copy
+import datetime
+import functools
+import json
+from typing import TYPE_CHECKING, Any, cast
 
-import pandas as pd
-import plotly.express as px
-import qrcode
 import streamlit as st
-from streamlit_autorefresh import st_autorefresh
 
+from lecture_feedback.qr_code import QrCodeFormat
+from lecture_feedback.room import RoomPart
 from lecture_feedback.state_provider import (
     ClientState,
     HostState,
@@ -14,25 +18,63 @@ from lecture_feedback.state_provider import (
     StateProvider,
 )
 from lecture_feedback.user_status import UserStatus
+from lecture_feedback.workers import get_other_worker_join_url, get_public_url
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+    import plotly.graph_objects as go
+
+    from lecture_feedback.status_history import StatusSample
 
-AUTOREFRESH_INTERVAL_MS = 2000
+REFRESH_INTERVAL_SECONDS = 2
+# independent of the refresh, sessions stay alive even if no view is refreshed
+HEARTBEAT_INTERVAL_SECONDS = 10
 USER_REMOVAL_TIMEOUT_SECONDS = (
     60  # if we go lower, chrome's background tab throttling causes faulty user removal
 )
+CLEANUP_INTERVAL_SECONDS = 5
+QR_CODE_FORMAT = QrCodeFormat.PNG  # SVG skips raster encoding
+QUESTIONS_PAGE_SIZE = 10
+MIN_TREND_SAMPLES = 2
+# distinct status counts whose statistics figure is kept
+STATISTICS_FIGURE_CACHE_SIZE = 256
 
 GREY_COLOR = "#9CA3AF"
 RED_COLOR = "#EF4444"
 YELLOW_COLOR = "#FBBF24"
 GREEN_COLOR = "#10B981"
+STATUS_COLORS = {
+    UserStatus.UNKNOWN: GREY_COLOR,
+    UserStatus.RED: RED_COLOR,
+    UserStatus.YELLOW: YELLOW_COLOR,
+    UserStatus.GREEN: GREEN_COLOR,
+}
+
+
+def redirect_to_other_worker(room_id: str) -> bool:
+    """Send the browser to the router if another worker owns the room."""
+    join_url = get_other_worker_join_url(room_id)
+    if join_url is None:
+        return False
+    # Streamlit can't redirect from the server, so the browser navigates itself
+    st.html(
+        f"<script>window.location.assign({json.dumps(join_url)});</script>",
+        unsafe_allow_javascript=True,
+    )
+    st.info(f"This room is served elsewhere, [continue to it]({join_url}).")
+    return True
 
 
 def show_room_selection_screen(lobby: LobbyState) -> None:
     if "room_id" in st.query_params:
-        try:
-            lobby.join_room(st.query_params["room_id"])
-            st.rerun()
-        except ValueError:
-            st.error("Room ID from URL not found")
+        room_id_from_url = st.query_params["room_id"]
+        if not redirect_to_other_worker(room_id_from_url):
+            try:
+                lobby.join_room(room_id_from_url)
+                st.rerun()
+            except ValueError:
+                st.error("Room ID from URL not found")
 
     st.title("Welcome to Lecture Feedback App")
     st.write("Host or join a room to share feedback.")
@@ -56,7 +98,7 @@ def show_room_selection_screen(lobby: LobbyState) -> None:
         if st.button("Join Room", width="stretch", key="join_room"):
             if not room_id:
                 st.warning("Please enter a Room ID to join.")
-            else:
+            elif not redirect_to_other_worker(room_id):
                 try:
                     lobby.join_room(room_id)
                     st.rerun()
@@ -109,54 +151,42 @@ def show_user_status_selection(room: ClientState) -> None:
         captions=[status.caption() for status in status_options],
         key="user_status_selection",
     )
+    if selected_user_status == current_user_status:
+        # the session is kept alive by the heartbeat, not by writing the status
+        return
     room.set_user_status(selected_user_status)
 
-    has_user_transitioned_away_from_unknown_status = (
-        current_user_status == UserStatus.UNKNOWN
-        and selected_user_status != UserStatus.UNKNOWN
-    )
-    if has_user_transitioned_away_from_unknown_status:
+    if current_user_status == UserStatus.UNKNOWN:
+        # the unknown option disappears once another status was selected
         st.rerun()
 
 
-def get_statistics_data_frame(room: RoomState) -> pd.DataFrame:
-    participants = room.get_room_participants()
-    counts = {
-        status.value: sum(1 for _, s in participants if s == status)
-        for status in UserStatus
-    }
-    df = pd.DataFrame([counts])
-    # Reorder columns: UNKNOWN (bottom), RED, YELLOW, GREEN (top)
-    column_order = [
-        UserStatus.UNKNOWN.value,
-        UserStatus.RED.value,
-        UserStatus.YELLOW.value,
-        UserStatus.GREEN.value,
-    ]
-    return df[[col for col in column_order if col in df.columns]]
+def get_statistics(room: RoomState) -> dict[UserStatus, int]:
+    counts = room.get_status_counts()
+    # Stacking order: UNKNOWN (bottom), RED, YELLOW, GREEN (top)
+    return {status: counts[status] for status in STATUS_COLORS}
 
 
-def show_room_statistics(room: HostState | ClientState) -> None:
-    st.subheader("Room Overview")
-    df = get_statistics_data_frame(room)
-
-    if df.sum().sum() == 0:
-        st.info("No participants yet. Share the Room ID to get started!")
-        return
+@functools.cache
+def _get_base_statistics_figure_data() -> dict[str, Any]:
+    # Building a figure is expensive due to plotly's validation, so it is built
+    # and validated once per process, renders only change the bar heights
+    import plotly.graph_objects as go  # noqa: PLC0415
 
-    fig = px.bar(
-        df,
-        x=df.index,
-        y=df.columns,
-        color_discrete_sequence=[
-            GREY_COLOR,
-            RED_COLOR,
-            YELLOW_COLOR,
-            GREEN_COLOR,
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=[0],
+                y=[0],
+                name=status.value,
+                marker_color=color,
+            )
+            for status, color in STATUS_COLORS.items()
         ],
     )
 
     fig.update_layout(
+        barmode="relative",
         showlegend=False,
         xaxis={"visible": False},
         yaxis={"visible": False},
@@ -168,6 +198,91 @@ def show_room_statistics(room: HostState | ClientState) -> None:
         marker_cornerradius=8,
     )
 
+    return cast("dict[str, Any]", fig.to_dict())
+
+
+@functools.lru_cache(maxsize=STATISTICS_FIGURE_CACHE_SIZE)
+def _get_statistics_figure_data(counts: tuple[int, ...]) -> dict[str, Any]:
+    """Figure data showing the counts, shared read-only by all sessions."""
+    data = copy.deepcopy(_get_base_statistics_figure_data())
+    for trace, count in zip(data["data"], counts, strict=True):
+        trace["y"] = [count]
+    return data
+
+
+def statistics_figure(statistics: dict[UserStatus, int]) -> go.Figure:
+    """A figure of its own showing the given counts, built without locking."""
+    import plotly.graph_objects as go  # noqa: PLC0415
+
+    # the data is valid, as it only differs from the base figure in the counts
+    return go.Figure(
+        _get_statistics_figure_data(tuple(statistics.values())),
+        _validate=False,
+    )
+
+
+def load_for_version[T](
+    room: RoomState,
+    part: RoomPart,
+    load: Callable[[], T],
+    variant: Hashable = None,
+) -> T:
+    """Reuse data this session loaded before, unless that part of the room changed.
+
+    Every rerun renders the part again, but only reloads its data after a
+    change. `variant` distinguishes different selections of the same part.
+    """
+    cache_key = _get_cache_key(part)
+    version = (room.room_id, room.get_version(part), variant)
+    cached = st.session_state.get(cache_key)
+    if cached is None or cached[0] != version:
+        cached = (version, load())
+        st.session_state[cache_key] = cached
+    return cast("T", cached[1])
+
+
+def _get_cache_key(part: RoomPart) -> str:
+    return f"{part.name.lower()}_cache"
+
+
+def get_rendered_version(room: RoomState, part: RoomPart) -> int | None:
+    """Version of the part this session rendered last, None if it didn't yet."""
+    cached = st.session_state.get(_get_cache_key(part))
+    if cached is None or cached[0][0] != room.room_id:
+        return None
+    return cast("int", cached[0][1])
+
+
+@st.fragment(run_every=REFRESH_INTERVAL_SECONDS)
+def watch_room_changes(
+    room: HostState | ClientState,
+    parts: tuple[RoomPart, ...],
+) -> None:
+    """Rerun the app once a part changed since this session rendered it.
+
+    The only view refreshed periodically, and it renders nothing, so an idle
+    viewer costs a few version reads. Streamlit can only rerun the whole app or
+    the running fragment, so a change reruns the app, where unchanged parts
+    reuse their data.
+    """
+    for part in parts:
+        if room.get_version(part) != get_rendered_version(room, part):
+            st.rerun()
+
+
+def show_room_statistics(room: HostState | ClientState) -> None:
+    st.subheader("Room Overview")
+    statistics = load_for_version(
+        room,
+        RoomPart.STATISTICS,
+        lambda: get_statistics(room),
+    )
+    participant_count = room.get_participant_count()
+
+    if participant_count == 0:
+        st.info("No participants yet. Share the Room ID to get started!")
+        return
+
     disable_interactions_config = {
         "displayModeBar": False,
         "staticPlot": True,
@@ -175,8 +290,10 @@ def show_room_statistics(room: HostState | ClientState) -> None:
 
     left_col, _ = st.columns([3, 2])
     with left_col:
-        st.plotly_chart(fig, config=disable_interactions_config)
-        participant_count = df.sum().sum()
+        st.plotly_chart(
+            statistics_figure(statistics),
+            config=disable_interactions_config,
+        )
         st.markdown(
             f"<p style='text-align: center;'>"
             f"Number of participants: {participant_count}"
@@ -185,24 +302,65 @@ def show_room_statistics(room: HostState | ClientState) -> None:
         )
 
 
-def generate_qr_code_image(room_id: str) -> bytes:
-    base_url = st.context.url
-    join_url = f"{base_url}?room_id={room_id}"
+def build_status_trend_figure(samples: tuple[StatusSample, ...]) -> go.Figure | None:
+    """Stacked area chart of the status counts, None until there is a trend."""
+    if len(samples) < MIN_TREND_SAMPLES:
+        return None
+    import plotly.graph_objects as go  # noqa: PLC0415
 
-    url_qr_code = qrcode.QRCode(
-        border=0,
-        box_size=3,
+    times = [
+        datetime.datetime.fromtimestamp(sample.timestamp, tz=datetime.UTC)
+        for sample in samples
+    ]
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=times,
+                y=[sample.counts[status] for sample in samples],
+                name=status.value,
+                mode="lines",
+                line={"width": 0, "color": color},
+                stackgroup="statuses",
+            )
+            for status, color in STATUS_COLORS.items()
+        ],
     )
-    url_qr_code.add_data(join_url)
-    url_qr_code.make(fit=True)
+    fig.update_layout(
+        showlegend=False,
+        yaxis={"visible": False},
+        margin={"l": 0, "r": 0, "t": 0, "b": 0},
+        height=150,
+    )
+    return fig
 
-    img = url_qr_code.make_image(fill_color="black", back_color="white")
-    img_bytes = io.BytesIO()
-    img.save(img_bytes)
-    return img_bytes.getvalue()
+
+def show_status_trend(host_state: HostState) -> None:
+    st.subheader("Trend")
+    # only rebuilt when a sample was added, building a figure is expensive
+    fig = load_for_version(
+        host_state,
+        RoomPart.HISTORY,
+        lambda: build_status_trend_figure(host_state.get_status_history()),
+    )
+    if fig is None:
+        st.info("The trend is shown once the lecture has been running for a while.")
+        return
+    st.plotly_chart(fig, config={"displayModeBar": False, "staticPlot": True})
 
 
-def show_active_room_header(room_id: str) -> None:
+def generate_qr_code_image(room: RoomState) -> bytes | str:
+    base_url = get_public_url() or st.context.url or ""
+    return room.get_join_qr_code(base_url, QR_CODE_FORMAT)
+
+
+def show_active_room_header(room: HostState | ClientState) -> None:
+    # the QR code only changes with the room itself
+    qr_code_image = load_for_version(
+        room,
+        RoomPart.METADATA,
+        lambda: generate_qr_code_image(room),
+    )
+    room_id = room.room_id
     st.query_params["room_id"] = room_id
     st.title("Active Room")
     left_col, right_col = st.columns([2, 1], gap="large")
@@ -212,14 +370,38 @@ def show_active_room_header(room_id: str) -> None:
         st.markdown(f"**{room_id}**")
         st.caption("Share this ID with participants to let them join")
     with right_col:
-        st.image(generate_qr_code_image(room_id), width="content")
+        st.image(qr_code_image, width="content")
 
     st.divider()
 
 
+@st.fragment(run_every=HEARTBEAT_INTERVAL_SECONDS)
+def keep_session_alive(room: HostState | ClientState) -> None:
+    """Mark the session as seen, without refreshing any view.
+
+    Renders nothing, so a heartbeat costs a single cheap update of the room.
+    Once the cleanup removed the session, rerun the app to leave the room.
+    """
+    if not room.heartbeat():
+        st.rerun()
+
+
+@st.fragment
 def show_open_questions(state: HostState | ClientState) -> None:
+    """Show the open questions, a vote or close only reruns this fragment."""
     st.subheader("Open Questions")
-    open_questions = state.get_open_questions()
+    if "visible_question_count" not in st.session_state:
+        st.session_state.visible_question_count = QUESTIONS_PAGE_SIZE
+    visible_question_count = st.session_state.visible_question_count
+    open_questions, open_question_count = load_for_version(
+        state,
+        RoomPart.QUESTIONS,
+        lambda: (
+            state.get_open_questions(limit=visible_question_count),
+            state.count_open_questions(),
+        ),
+        variant=visible_question_count,
+    )
     if not open_questions:
         st.info("No questions yet.")
     else:
@@ -236,7 +418,7 @@ def show_open_questions(state: HostState | ClientState) -> None:
                         width="stretch",
                     ):
                         state.close_question(question.id)
-                        st.rerun()
+                        st.rerun(scope="fragment")
                 elif isinstance(state, ClientState):
                     has_voted = state.has_voted(question)
                     if st.button(
@@ -247,20 +429,35 @@ def show_open_questions(state: HostState | ClientState) -> None:
                         width="stretch",
                     ):
                         state.upvote_question(question.id)
-                        st.rerun()
+                        st.rerun(scope="fragment")
+
+        if open_question_count > visible_question_count:
+
+            def show_more_questions() -> None:
+                st.session_state.visible_question_count += QUESTIONS_PAGE_SIZE
+
+            st.button(
+                f"Show more questions ({open_question_count - visible_question_count}"
+                " hidden)",
+                key="show_more_questions",
+                on_click=show_more_questions,
+            )
 
 
 def show_active_room_host(host_state: HostState) -> None:
-    show_active_room_header(host_state.room_id)
+    show_active_room_header(host_state)
     show_room_statistics(host_state)
+    show_status_trend(host_state)
 
     st.divider()
 
     show_open_questions(host_state)
+    watch_room_changes(host_state, tuple(RoomPart))
+    keep_session_alive(host_state)
 
 
 def show_active_room_client(client_state: ClientState) -> None:
-    show_active_room_header(client_state.room_id)
+    show_active_room_header(client_state)
 
     col_left, col_right = st.columns(2, gap="medium")
     with col_left:
@@ -288,14 +485,20 @@ def show_active_room_client(client_state: ClientState) -> None:
         )
 
     show_open_questions(client_state)
+    # the status history is only shown to the host
+    watch_room_changes(
+        client_state,
+        (RoomPart.STATISTICS, RoomPart.QUESTIONS, RoomPart.METADATA),
+    )
+    keep_session_alive(client_state)
 
 
 def run() -> None:
-    st_autorefresh(interval=AUTOREFRESH_INTERVAL_MS, key="data_refresh")
-
     state_provider = StateProvider()
-    cleanup = state_provider.get_cleanup(USER_REMOVAL_TIMEOUT_SECONDS)
-    cleanup.cleanup_all()
+    state_provider.start_cleanup(
+        USER_REMOVAL_TIMEOUT_SECONDS,
+        CLEANUP_INTERVAL_SECONDS,
+    )
 
     match state_provider.get_current():
         case HostState() as host:
@@ -304,3 +507,5 @@ def run() -> None:
             show_active_room_client(client)
         case LobbyState() as lobby:
             show_room_selection_screen(lobby)
+    # last, as it may render an element and shift those of the page
+    state_provider.persist_session()
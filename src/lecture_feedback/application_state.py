@@ -1,35 +1,190 @@
-from lecture_feedback.room import Room
-from lecture_feedback.thread_safe_dict import ThreadSafeDict
-from lecture_feedback.user_status import UserStatus
+import threading
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from lecture_feedback.cleanup_scheduler import CleanupScheduler
+from lecture_feedback.event_log import EventLog, FsyncPolicy, replay_events
+from lecture_feedback.expiry_queue import ExpiryQueue
+from lecture_feedback.qr_code import QrCodeCache
+from lecture_feedback.room import Room, RoomRecord
+from lecture_feedback.session_store import DictSessionStore, SessionStore
+from lecture_feedback.snapshot_log import SnapshotLog, SnapshotScheduler
+from lecture_feedback.thread_safe_dict import ShardedDict, ThreadSafeDict
 
 
 class ApplicationState:
     """Application-wide shared state."""
 
-    def __init__(self) -> None:
-        self.rooms: ThreadSafeDict[Room] = ThreadSafeDict()
+    def __init__(
+        self,
+        session_store_factory: Callable[[], SessionStore] = DictSessionStore,
+    ) -> None:
+        # read on every rerun, written only when rooms come and go; sharded
+        # so that joins and cleanup in one shard don't block the others
+        self.rooms: ShardedDict[Room] = ShardedDict()
+        # session_id -> room_id, so lookups don't have to scan every room
+        self._session_rooms: ThreadSafeDict[str] = ThreadSafeDict()
+        self._host_expiry = ExpiryQueue()
+        # creates the store of the sessions of every room
+        self._session_store_factory = session_store_factory
+        self.qr_codes = QrCodeCache()
+        self.cleanup_scheduler: CleanupScheduler | None = None
+        self._cleanup_scheduler_lock = threading.Lock()
+        self._snapshot_log: SnapshotLog | None = None
+        self.snapshot_scheduler: SnapshotScheduler | None = None
+        self.event_log: EventLog | None = None
 
-    def get_session_room(self, session_id: str) -> Room | None:
+    def start_cleanup_scheduler(
+        self,
+        timeout_seconds: int,
+        interval_seconds: float,
+    ) -> None:
+        with self._cleanup_scheduler_lock:
+            if self.cleanup_scheduler is not None:
+                return
+            self.cleanup_scheduler = CleanupScheduler(
+                self,
+                timeout_seconds,
+                interval_seconds,
+            )
+            self.cleanup_scheduler.start()
+
+    def start_snapshots(self, path: str, interval_seconds: float) -> int:
+        """Restore the rooms from the snapshot log, then keep writing it.
+
+        Returns the number of restored rooms.
+        """
+        self._snapshot_log = SnapshotLog(path)
+        restored_count = self._snapshot_log.restore(self)
+        self.snapshot_scheduler = SnapshotScheduler(
+            self,
+            self._snapshot_log,
+            interval_seconds,
+        )
+        self.snapshot_scheduler.start()
+        return restored_count
+
+    def start_event_log(self, path: str, fsync_policy: FsyncPolicy) -> int:
+        """Replay the events of the log, then log all further mutations to it.
+
+        With snapshots, only the events after those the restored snapshot
+        contains are replayed. Returns the number of replayed events.
+        """
+        first_event = 0
+        if self._snapshot_log is not None:
+            first_event = self._snapshot_log.event_count
+        event_count = 0
+        if Path(path).exists():
+            event_count = replay_events(path, self, first_event)
+        if self._snapshot_log is not None and event_count < first_event:
+            # e.g. the OS crashed before the last events were forced to disk
+            self._snapshot_log.reset_event_count(event_count)
+        self.event_log = EventLog(path, fsync_policy, event_count=event_count)
         for room in self.rooms.values():
-            if room.has_session(session_id):
-                return room
-        return None
+            room.attach_event_log(self.event_log)
+        return max(0, event_count - first_event)
+
+    def _log(self, event_type: str, **fields: object) -> None:
+        if self.event_log is not None:
+            self.event_log.append(event_type, **fields)
+
+    def restore_rooms(self, records: Iterable[RoomRecord]) -> list[Room]:
+        rooms = [
+            Room.from_record(record, self._host_expiry, self._session_store_factory())
+            for record in records
+        ]
+        # in bulk, as adding rooms one by one copies the shards over and over
+        self._session_rooms.update(
+            {
+                session_id: room.room_id
+                for room in rooms
+                for session_id in room.get_session_ids()
+            },
+        )
+        self.rooms.update({room.room_id: room for room in rooms})
+        return rooms
+
+    def get_session_room(self, session_id: str) -> Room | None:
+        room_id = self._session_rooms.get(session_id)
+        if room_id is None:
+            return None
+        # None if the room was removed since the lookup
+        return self.rooms.get(room_id)
 
     def create_room(self, room_id: str, session_id: str) -> None:
-        room = Room(room_id, session_id)
-        self.rooms[room_id] = room
+        room = Room(
+            room_id,
+            session_id,
+            self._host_expiry,
+            self.event_log,
+            self._session_store_factory(),
+        )
+        with self.rooms.shard(room_id):
+            # replayed onto a snapshot that contains the room already
+            if room_id in self.rooms:
+                return
+            self.rooms[room_id] = room
+            self._session_rooms[session_id] = room_id
+            self._log("create_room", room_id=room_id, session_id=session_id)
 
     def join_room(self, room_id: str, session_id: str) -> None:
-        if room_id not in self.rooms:
-            message = f"Room {room_id} does not exist"
-            raise ValueError(message)
-        self.rooms[room_id].set_session_status(session_id, UserStatus.UNKNOWN)
-
-    def remove_rooms_with_inactive_hosts(self, timeout_seconds: int) -> None:
-        inactive_room_ids = [
-            room_id
-            for room_id, room in self.rooms.items()
-            if room.is_host_inactive(timeout_seconds)
-        ]
-        for room_id in inactive_room_ids:
-            del self.rooms[room_id]
+        with self.rooms.shard(room_id):
+            if room_id not in self.rooms:
+                message = f"Room {room_id} does not exist"
+                raise ValueError(message)
+            self.rooms[room_id].add_session(session_id)
+            self._session_rooms[session_id] = room_id
+            self._log("join_room", room_id=room_id, session_id=session_id)
+
+    def remove_inactive_sessions(self, timeout_seconds: int) -> int:
+        removed_count = 0
+        for shard in self.rooms.shards:
+            with shard:
+                for room in shard.values():
+                    session_ids = room.remove_inactive_sessions(timeout_seconds)
+                    self._forget_sessions(room, session_ids)
+                    removed_count += len(session_ids)
+        return removed_count
+
+    def sample_status_histories(self) -> None:
+        for room in self.rooms.values():
+            room.sample_status_history()
+
+    def remove_sessions(self, room: Room, session_ids: list[str]) -> None:
+        with self.rooms.shard(room.room_id):
+            room.remove_sessions(session_ids)
+            self._forget_sessions(room, session_ids)
+
+    def _forget_sessions(self, room: Room, session_ids: list[str]) -> None:
+        if not session_ids:
+            return
+        self._unindex_sessions(room.room_id, session_ids)
+        self._log("remove_sessions", room_id=room.room_id, session_ids=session_ids)
+
+    def _unindex_sessions(self, room_id: str, session_ids: list[str]) -> None:
+        with self._session_rooms:
+            for session_id in session_ids:
+                # the session may have joined another room since
+                if self._session_rooms.get(session_id) == room_id:
+                    del self._session_rooms[session_id]
+
+    def remove_rooms_with_inactive_hosts(self, timeout_seconds: int) -> int:
+        deadline = time.time() - timeout_seconds
+        return sum(
+            self.remove_room(room_id)
+            for room_id in self._host_expiry.pop_expired(deadline)
+        )
+
+    def remove_room(self, room_id: str) -> bool:
+        with self.rooms.shard(room_id) as shard:
+            # a stale host view may have touched an already removed room
+            if room_id not in shard:
+                return False
+            room = shard[room_id]
+            del shard[room_id]
+            self._unindex_sessions(room_id, room.get_session_ids())
+            self._log("remove_room", room_id=room_id)
+        self.qr_codes.evict_room(room_id)
+        room.close()
+        return True
@@ -0,0 +1,65 @@
+from typing import Protocol
+
+from lecture_feedback.qr_code import QrCodeCache
+from lecture_feedback.room import Question, RoomPart, RoomSnapshot
+from lecture_feedback.status_history import StatusSample
+from lecture_feedback.user_status import UserStatus
+
+
+class RoomBackend(Protocol):
+    """A room as the views use it, wherever its state is stored."""
+
+    @property
+    def room_id(self) -> str: ...
+
+    def get_version(self, part: RoomPart) -> int: ...
+
+    def is_host(self, session_id: str) -> bool: ...
+
+    def update_host_last_seen(self) -> None: ...
+
+    def set_session_status(self, session_id: str, status: UserStatus) -> bool: ...
+
+    def get_session_status(self, session_id: str) -> UserStatus: ...
+
+    def get_status_history(self) -> tuple[StatusSample, ...]: ...
+
+    def update_session(self, session_id: str) -> bool: ...
+
+    def get_snapshot(self) -> RoomSnapshot: ...
+
+    def add_question(self, session_id: str, text: str) -> None: ...
+
+    def upvote_question(self, session_id: str, question_id: str) -> None: ...
+
+    def has_voted(self, session_id: str, question: Question) -> bool: ...
+
+    def close_question(self, question_id: str) -> None: ...
+
+
+class StateBackend(Protocol):
+    """Storage of all rooms and sessions.
+
+    `ApplicationState` keeps everything in memory of one process, while
+    `SqliteStateBackend` shares it between worker processes.
+    """
+
+    qr_codes: QrCodeCache
+
+    def start_cleanup_scheduler(
+        self,
+        timeout_seconds: int,
+        interval_seconds: float,
+    ) -> None: ...
+
+    def get_session_room(self, session_id: str) -> RoomBackend | None: ...
+
+    def create_room(self, room_id: str, session_id: str) -> None: ...
+
+    def join_room(self, room_id: str, session_id: str) -> None: ...
+
+    def remove_inactive_sessions(self, timeout_seconds: int) -> int: ...
+
+    def remove_rooms_with_inactive_hosts(self, timeout_seconds: int) -> int: ...
+
+    def sample_status_histories(self) -> None: ...
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import dataclasses
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from lecture_feedback.periodic_thread import PeriodicThread
+
+if TYPE_CHECKING:
+    from lecture_feedback.backend import StateBackend
+
+
+@dataclass
+class CleanupMetrics:
+    sweep_count: int = 0
+    last_sweep_duration_seconds: float = 0.0
+    total_sweep_duration_seconds: float = 0.0
+    sessions_evicted: int = 0
+    rooms_evicted: int = 0
+
+
+class CleanupScheduler:
+    """Removes inactive sessions and rooms on a background daemon thread.
+
+    Every sweep also samples the status history of the rooms.
+
+    Keeps expiry out of the request path: instead of every rerun sweeping all
+    rooms, a single thread sweeps once per interval.
+    """
+
+    def __init__(
+        self,
+        application_state: StateBackend,
+        timeout_seconds: int,
+        interval_seconds: float,
+    ) -> None:
+        self._application_state = application_state
+        self._timeout_seconds = timeout_seconds
+        self._metrics = CleanupMetrics()
+        self._metrics_lock = threading.Lock()
+        self._thread = PeriodicThread("cleanup-scheduler", self.sweep, interval_seconds)
+
+    @property
+    def metrics(self) -> CleanupMetrics:
+        with self._metrics_lock:
+            return dataclasses.replace(self._metrics)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._thread.stop()
+
+    def sweep(self) -> None:
+        start = time.perf_counter()
+        sessions_evicted = self._application_state.remove_inactive_sessions(
+            self._timeout_seconds,
+        )
+        rooms_evicted = self._application_state.remove_rooms_with_inactive_hosts(
+            self._timeout_seconds,
+        )
+        self._application_state.sample_status_histories()
+        duration = time.perf_counter() - start
+
+        with self._metrics_lock:
+            self._metrics.sweep_count += 1
+            self._metrics.last_sweep_duration_seconds = duration
+            self._metrics.total_sweep_duration_seconds += duration
+            self._metrics.sessions_evicted += sessions_evicted
+            self._metrics.rooms_evicted += rooms_evicted
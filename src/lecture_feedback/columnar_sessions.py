@@ -0,0 +1,101 @@
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+import numpy.typing as npt
+
+from lecture_feedback.user_status import UserStatus
+
+STATUSES = tuple(UserStatus)
+STATUS_INDICES = {status: index for index, status in enumerate(STATUSES)}
+# status of unused slots, counted in a bin of its own
+FREE_SLOT = len(STATUSES)
+
+
+class ColumnarSessionStore:
+    """Sessions as rows of a status and a last seen column of NumPy arrays.
+
+    Expiring is a single vectorised comparison and counting a single
+    `bincount`, updating a session only writes into its slot. Slots of removed
+    sessions are reused, and the columns double in size when they are full.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        self._slots: dict[str, int] = {}
+        # session ID of every slot, empty for unused slots
+        self._session_ids = [""] * capacity
+        self._free_slots = list(range(capacity - 1, -1, -1))
+        self._statuses = np.full(capacity, FREE_SLOT, dtype=np.uint8)
+        # unused slots never expire
+        self._last_seen = np.full(capacity, np.inf)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._slots))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get_status(self, session_id: str) -> UserStatus:
+        return STATUSES[int(self._statuses[self._slots[session_id]])]
+
+    def set_status(
+        self,
+        session_id: str,
+        status: UserStatus,
+        timestamp: float,
+    ) -> UserStatus | None:
+        slot = self._slots.get(session_id)
+        previous_status = None
+        if slot is None:
+            if not self._free_slots:
+                self._grow()
+            slot = self._free_slots.pop()
+            self._slots[session_id] = slot
+            self._session_ids[slot] = session_id
+        else:
+            previous_status = STATUSES[int(self._statuses[slot])]
+        self._statuses[slot] = STATUS_INDICES[status]
+        self._last_seen[slot] = timestamp
+        return previous_status
+
+    def touch(self, session_id: str, timestamp: float) -> None:
+        slot = self._slots.get(session_id)
+        if slot is not None:
+            self._last_seen[slot] = timestamp
+
+    def remove(self, session_ids: Iterable[str]) -> None:
+        self._free([self._slots[session_id] for session_id in session_ids])
+
+    def pop_expired(self, deadline: float) -> list[str]:
+        slots = np.flatnonzero(self._last_seen < deadline).tolist()
+        expired_ids = [self._session_ids[slot] for slot in slots]
+        self._free(slots)
+        return expired_ids
+
+    def status_counts(self) -> dict[UserStatus, int]:
+        counts = np.bincount(self._statuses, minlength=FREE_SLOT + 1)
+        return dict(zip(STATUSES, counts[:FREE_SLOT].tolist(), strict=True))
+
+    def _free(self, slots: list[int]) -> None:
+        self._statuses[slots] = FREE_SLOT
+        self._last_seen[slots] = np.inf
+        for slot in slots:
+            del self._slots[self._session_ids[slot]]
+            self._session_ids[slot] = ""
+            self._free_slots.append(slot)
+
+    def _grow(self) -> None:
+        capacity = len(self._session_ids)
+        self._session_ids.extend([""] * capacity)
+        self._free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+        self._statuses = _extend(self._statuses, FREE_SLOT)
+        self._last_seen = _extend(self._last_seen, np.inf)
+
+
+def _extend[T: np.generic](
+    column: npt.NDArray[T],
+    fill_value: float,
+) -> npt.NDArray[T]:
+    return np.concatenate([column, np.full(len(column), fill_value, column.dtype)])
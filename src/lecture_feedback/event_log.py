@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from lecture_feedback.json_lines import read_json_lines
+from lecture_feedback.user_status import UserStatus
+
+if TYPE_CHECKING:
+    from lecture_feedback.application_state import ApplicationState
+
+
+class FsyncPolicy(Enum):
+    """When written events are forced to disk."""
+
+    ALWAYS = "always"  # after every write, nothing written is lost on a crash
+    INTERVAL = "interval"  # at most once per interval, loses the last interval
+    NEVER = "never"  # whenever the OS decides to
+
+
+class EventLog:
+    """Append-only JSON lines log of the mutations of the application state.
+
+    With batching, a writer thread commits all events that queued up while it
+    wrote the previous batch with a single write and fsync (group commit), so
+    appending never waits for the disk. Without batching, every append writes
+    and syncs on the calling thread.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        fsync_policy: FsyncPolicy = FsyncPolicy.INTERVAL,
+        *,
+        batching: bool = True,
+        fsync_interval_seconds: float = 1.0,
+        event_count: int = 0,
+    ) -> None:
+        """`event_count` is the number of events in the log already."""
+        self._file = Path(path).open("a", encoding="utf-8")  # noqa: SIM115
+        self._fsync_policy = fsync_policy
+        self._fsync_interval_seconds = fsync_interval_seconds
+        self._last_fsync = time.monotonic()
+        self._batching = batching
+        self._condition = threading.Condition()
+        self._pending: list[str] = []
+        self._initial_count = event_count
+        self._appended_count = 0
+        self._written_count = 0
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run,
+            name="event-log-writer",
+            daemon=True,
+        )
+        if batching:
+            self._thread.start()
+
+    def append(self, event_type: str, **fields: object) -> None:
+        line = json.dumps({"type": event_type, "time": time.time(), **fields})
+        with self._condition:
+            self._appended_count += 1
+            if not self._batching:
+                self._write([line])
+                self._written_count += 1
+                return
+            self._pending.append(line)
+            self._condition.notify_all()
+
+    @property
+    def written_count(self) -> int:
+        """Number of events in the file, without those not written yet.
+
+        Events still waiting for the writer thread are lost on a crash, so
+        they must not count as part of the log.
+        """
+        with self._condition:
+            return self._initial_count + self._written_count
+
+    def flush(self) -> None:
+        """Wait until all events appended so far are written."""
+        with self._condition:
+            appended_count = self._appended_count
+            self._condition.wait_for(lambda: self._written_count >= appended_count)
+
+    def close(self) -> None:
+        """Write the pending events, force them to disk and close the file."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._batching:
+            self._thread.join()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, []
+            # outside the lock, so that appending doesn't wait for the disk
+            self._write(batch)
+            with self._condition:
+                self._written_count += len(batch)
+                self._condition.notify_all()
+
+    def _write(self, lines: list[str]) -> None:
+        self._file.writelines(f"{line}\n" for line in lines)
+        self._file.flush()
+        now = time.monotonic()
+        if self._fsync_policy is FsyncPolicy.ALWAYS or (
+            self._fsync_policy is FsyncPolicy.INTERVAL
+            and now - self._last_fsync >= self._fsync_interval_seconds
+        ):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+
+def replay_events(
+    path: str | Path,
+    application_state: ApplicationState,
+    first_event: int = 0,
+) -> int:
+    """Apply the events of the log from `first_event` on to the state.
+
+    Returns the number of events in the log. Applying an event the state
+    already contains changes nothing, so they can be replayed onto a snapshot
+    that contains some of them. The state must not log itself, or the events
+    would be logged twice. An event cut short by a crash is dropped from the
+    log.
+    """
+    event_count = 0
+    for event in read_json_lines(Path(path)):
+        if event_count >= first_event:
+            _apply_event(event, application_state)
+        event_count += 1
+    return event_count
+
+
+def _apply_event(event: dict[str, Any], application_state: ApplicationState) -> None:
+    match event["type"]:
+        case "create_room":
+            application_state.create_room(event["room_id"], event["session_id"])
+            return
+        case "remove_room":
+            application_state.remove_room(event["room_id"])
+            return
+
+    # a stale view may have changed a room that was removed before
+    room = application_state.rooms.get(event["room_id"])
+    if room is None:
+        return
+    match event["type"]:
+        case "join_room":
+            application_state.join_room(event["room_id"], event["session_id"])
+        case "remove_sessions":
+            application_state.remove_sessions(room, event["session_ids"])
+        case "set_session_status":
+            room.set_session_status(
+                event["session_id"],
+                UserStatus[event["status"]],
+            )
+        case "add_question":
+            room.add_question(
+                event["session_id"],
+                event["text"],
+                question_id=event["question_id"],
+            )
+        case "upvote_question":
+            room.upvote_question(event["session_id"], event["question_id"])
+        case "close_question":
+            room.close_question(event["question_id"])
@@ -0,0 +1,40 @@
+import threading
+from collections import OrderedDict
+
+
+class ExpiryQueue:
+    """Keys ordered by the time they were last seen.
+
+    Timestamps only move forward, so touching a key moves it to the back and
+    the least recently seen keys are always at the front. Evicting expired keys
+    therefore only touches the keys that actually expired.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._last_seen: OrderedDict[str, float] = OrderedDict()
+
+    def touch(self, key: str, timestamp: float) -> None:
+        with self._lock:
+            self._last_seen[key] = timestamp
+            self._last_seen.move_to_end(key)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._last_seen.pop(key, None)
+
+    def pop_expired(self, deadline: float) -> list[str]:
+        """Remove and return all keys last seen before the deadline."""
+        expired_keys = []
+        with self._lock:
+            while self._last_seen:
+                key, last_seen = next(iter(self._last_seen.items()))
+                if last_seen >= deadline:
+                    break
+                del self._last_seen[key]
+                expired_keys.append(key)
+        return expired_keys
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._last_seen)
@@ -0,0 +1,44 @@
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+
+SECRET_VARIABLE = "LECTURE_FEEDBACK_SECRET"  # noqa: S105
+SESSION_COOKIE_NAME = "lecture_feedback_session"
+SESSION_COOKIE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+# without a configured secret, only cookies signed by this process are trusted
+_process_secret = secrets.token_bytes(32)
+
+
+def _get_secret() -> bytes:
+    secret = os.environ.get(SECRET_VARIABLE)
+    return secret.encode() if secret else _process_secret
+
+
+def warn_if_secret_is_missing() -> None:
+    """Warn that without a secret, cookies don't survive a restart."""
+    if not os.environ.get(SECRET_VARIABLE):
+        logger.warning(
+            "%s is not set, session cookies are only valid for this process",
+            SECRET_VARIABLE,
+        )
+
+
+def sign_session_id(session_id: str) -> str:
+    """Cookie value of the session ID, which the browser can't forge."""
+    signature = hmac.new(_get_secret(), session_id.encode(), hashlib.sha256)
+    return f"{session_id}.{signature.hexdigest()}"
+
+
+def verify_session_cookie(cookie: str | None) -> str | None:
+    """The session ID of a cookie from `sign_session_id`, None if it is invalid."""
+    if not cookie:
+        return None
+    session_id, _, _ = cookie.rpartition(".")
+    if session_id and hmac.compare_digest(sign_session_id(session_id), cookie):
+        return session_id
+    return None
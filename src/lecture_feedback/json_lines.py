@@ -0,0 +1,37 @@
+import json
+import logging
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def read_json_lines(path: Path) -> Iterator[dict[str, Any]]:
+    """The records of a JSON lines file that is only ever appended to.
+
+    A crash in the middle of an append leaves a partial last line behind.
+    Reading stops at the first incomplete line, and once all records were
+    read, the file is cut back to the last complete one, so that the next
+    append starts on a line of its own.
+    """
+    complete_size = 0
+    with path.open("rb") as file:
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            complete_size += len(line)
+            yield record
+        else:
+            return
+    logger.warning(
+        "Dropping the incomplete end of %s after byte %d",
+        path,
+        complete_size,
+    )
+    with path.open("r+b") as file:
+        file.truncate(complete_size)
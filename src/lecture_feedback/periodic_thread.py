@@ -0,0 +1,38 @@
+import logging
+import threading
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicThread:
+    """Runs a task once per interval on a background daemon thread.
+
+    A failed run is logged and doesn't end the thread, the next one may succeed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        task: Callable[[], object],
+        interval_seconds: float,
+    ) -> None:
+        self._task = task
+        self._interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop after the current run, if any."""
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._interval_seconds):
+            try:
+                self._task()
+            except Exception:
+                logger.exception("Periodic task of %s failed", self._thread.name)
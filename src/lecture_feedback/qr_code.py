@@ -0,0 +1,83 @@
+import io
+import threading
+from collections import OrderedDict
+from enum import Enum
+
+
+class QrCodeFormat(Enum):
+    PNG = "png"
+    SVG = "svg"
+
+
+def render_join_qr_code(join_url: str, image_format: QrCodeFormat) -> bytes | str:
+    """Render the QR code as PNG bytes or as SVG markup."""
+    # imported on first use, qrcode pulls in PIL, which the lobby doesn't need
+    import qrcode  # noqa: PLC0415
+    import qrcode.image.svg  # noqa: PLC0415
+
+    if image_format is QrCodeFormat.SVG:
+        # SVG box sizes are tenths of a millimeter, 8 matches the 3px PNG modules
+        svg_qr_code = qrcode.QRCode(
+            border=0,
+            box_size=8,
+            image_factory=qrcode.image.svg.SvgPathImage,
+        )
+        svg_qr_code.add_data(join_url)
+        svg_qr_code.make(fit=True)
+        return svg_qr_code.make_image().to_string(encoding="unicode")
+
+    url_qr_code = qrcode.QRCode(
+        border=0,
+        box_size=3,
+    )
+    url_qr_code.add_data(join_url)
+    url_qr_code.make(fit=True)
+
+    img = url_qr_code.make_image(fill_color="black", back_color="white")
+    img_bytes = io.BytesIO()
+    img.save(img_bytes)
+    return img_bytes.getvalue()
+
+
+class QrCodeCache:
+    """Bounded LRU cache of rendered join QR codes.
+
+    The image only depends on the base URL and the room ID, so every host and
+    client of a room can share it instead of re-encoding it on every rerun.
+    """
+
+    def __init__(self, max_size: int = 256) -> None:
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._images: OrderedDict[tuple[str, str, QrCodeFormat], bytes | str] = (
+            OrderedDict()
+        )
+
+    def get(
+        self,
+        base_url: str,
+        room_id: str,
+        image_format: QrCodeFormat,
+    ) -> bytes | str:
+        key = (base_url, room_id, image_format)
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                return self._images[key]
+
+        # render outside the lock, a rare duplicate render is cheaper than waiting
+        image = render_join_qr_code(f"{base_url}?room_id={room_id}", image_format)
+        with self._lock:
+            self._images[key] = image
+            if len(self._images) > self._max_size:
+                self._images.popitem(last=False)
+        return image
+
+    def evict_room(self, room_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._images if key[1] == room_id]:
+                del self._images[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._images)
@@ -1,88 +1,371 @@
+import bisect
+import dataclasses
+import heapq
+import itertools
+import threading
 import time
 import uuid
-from collections.abc import Iterator
+from collections.abc import Iterator, Mapping
 from dataclasses import dataclass
+from enum import Enum, auto
+from types import MappingProxyType
+from typing import Self, TypedDict
 
+from lecture_feedback.event_log import EventLog
+from lecture_feedback.expiry_queue import ExpiryQueue
+from lecture_feedback.session_store import DictSessionStore, SessionStore
+from lecture_feedback.status_history import StatusHistory, StatusSample
 from lecture_feedback.thread_safe_dict import ThreadSafeDict
 from lecture_feedback.user_status import UserStatus
 
 
-@dataclass
-class UserSession:
-    status: UserStatus
-    last_seen: float
-
-
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Question:
     id: str
     text: str
-    voter_ids: set[str]
+    # bit i is set if the participant with index i in the room voted
+    voters: int
+    vote_count: int
+
+    def has_voter(self, participant_index: int) -> bool:
+        return bool(self.voters >> participant_index & 1)
+
+    def voter_indices(self) -> Iterator[int]:
+        voters = self.voters
+        while voters:
+            lowest_voter = voters & -voters
+            yield lowest_voter.bit_length() - 1
+            voters ^= lowest_voter
+
+
+STATUS_HISTORY_INTERVAL_SECONDS = 10
+
+
+class RoomRecord(TypedDict):
+    """What is kept of a room across restarts, see `Room.to_record`."""
+
+    room_id: str
+    host_id: str
+    # session_id -> UserStatus name
+    sessions: dict[str, str]
+    participants: dict[str, int]
+    # (id, text, voters, vote_count) in submission order
+    questions: list[tuple[str, str, int, int]]
+
+
+class RoomPart(Enum):
+    """Parts of a room that viewers can refresh independently."""
+
+    STATISTICS = auto()
+    QUESTIONS = auto()
+    METADATA = auto()
+    HISTORY = auto()
 
-    @property
-    def vote_count(self) -> int:
-        return len(self.voter_ids)
+
+@dataclass(frozen=True, slots=True)
+class RoomSnapshot:
+    """Everything the viewers of a room read on a refresh, at one version.
+
+    All viewers share the same snapshot until the statistics or questions
+    change, so a refresh costs the same no matter how large the room is.
+    """
+
+    # versions of the statistics and questions it was built from
+    versions: tuple[int, int]
+    status_counts: Mapping[UserStatus, int]
+    participant_count: int
+    # most votes first, ties in submission order
+    open_questions: tuple[Question, ...]
+
+    @classmethod
+    def build(
+        cls,
+        versions: tuple[int, int],
+        status_counts: dict[UserStatus, int],
+        open_questions: tuple[Question, ...],
+    ) -> Self:
+        return cls(
+            versions,
+            MappingProxyType(status_counts),
+            sum(status_counts.values()),
+            open_questions,
+        )
 
 
 class Room:
-    def __init__(self, room_id: str, host_id: str) -> None:
+    def __init__(
+        self,
+        room_id: str,
+        host_id: str,
+        host_expiry: ExpiryQueue | None = None,
+        event_log: EventLog | None = None,
+        session_store: SessionStore | None = None,
+    ) -> None:
         self._room_id = room_id
-        self._sessions: ThreadSafeDict[UserSession] = ThreadSafeDict()
+        self._event_log = event_log
+        self._sessions = (
+            session_store if session_store is not None else DictSessionStore()
+        )
+        self._sessions_lock = threading.Lock()
         self._host_id = host_id
-        self._host_last_seen = time.time()
+        # shared with the owner of the room, so it can find rooms of gone hosts
+        self._host_expiry = host_expiry if host_expiry is not None else ExpiryQueue()
+        self.update_host_last_seen()
         self._questions: ThreadSafeDict[Question] = ThreadSafeDict()
+        # session_id -> index into the voter bitmaps, only of sessions with a
+        # vote on an open question, so the bitmaps don't grow with everyone who
+        # ever joined; indices freed by closing questions are reused
+        self._participant_indices: dict[str, int] = {}
+        # participant index -> (session_id, number of votes on open questions)
+        self._participant_votes: dict[int, tuple[str, int]] = {}
+        self._free_participant_indices: list[int] = []
+        self._next_participant_index = itertools.count()
+        # (-vote_count, submission order, question_id) of open questions, sorted
+        self._question_ranking: list[tuple[int, int, str]] = []
+        self._question_rank_keys: dict[str, tuple[int, int, str]] = {}
+        self._question_order = itertools.count()
+        self._open_questions: tuple[Question, ...] | None = ()
+        self._status_history = StatusHistory(STATUS_HISTORY_INTERVAL_SECONDS)
+        self._versions = dict.fromkeys(RoomPart, 0)
+        self._versions_lock = threading.Lock()
+        self._snapshot: RoomSnapshot | None = None
+
+    @classmethod
+    def from_record(
+        cls,
+        record: RoomRecord,
+        host_expiry: ExpiryQueue | None = None,
+        session_store: SessionStore | None = None,
+    ) -> Self:
+        """Rebuild a room, its host and sessions count as just seen."""
+        room = cls(
+            record["room_id"],
+            record["host_id"],
+            host_expiry,
+            session_store=session_store,
+        )
+        # nobody else sees the room yet, so it is filled without locking
+        current_time = time.time()
+        for session_id, status_name in record["sessions"].items():
+            room._sessions.set_status(session_id, UserStatus[status_name], current_time)
+        for question_id, text, voters, vote_count in record["questions"]:
+            room._questions[question_id] = Question(
+                question_id,
+                text,
+                voters,
+                vote_count,
+            )
+            room._rank_question(question_id, (-vote_count, next(room._question_order)))
+        room._participant_indices = dict(record["participants"])
+        room._participant_votes = {
+            participant_index: (session_id, 0)
+            for session_id, participant_index in record["participants"].items()
+        }
+        for question in room._questions.values():
+            for participant_index in question.voter_indices():
+                room._count_vote(participant_index, 1)
+        next_participant_index = max(record["participants"].values(), default=-1) + 1
+        room._free_participant_indices = sorted(
+            set(range(next_participant_index)) - set(record["participants"].values()),
+        )
+        room._next_participant_index = itertools.count(next_participant_index)
+        return room
+
+    def to_record(self) -> RoomRecord:
+        with self._sessions_lock:
+            sessions = {
+                session_id: self._sessions.get_status(session_id).name
+                for session_id in self._sessions
+            }
+        with self._questions:
+            participants = self._participant_indices.copy()
+            questions = [
+                self._questions[question_id]
+                for _, _, question_id in sorted(
+                    self._question_rank_keys.values(),
+                    key=lambda rank_key: rank_key[1],
+                )
+            ]
+        return RoomRecord(
+            room_id=self._room_id,
+            host_id=self._host_id,
+            sessions=sessions,
+            participants=participants,
+            questions=[
+                (question.id, question.text, question.voters, question.vote_count)
+                for question in questions
+            ],
+        )
+
+    def attach_event_log(self, event_log: EventLog) -> None:
+        self._event_log = event_log
+
+    def _log(self, event_type: str, **fields: object) -> None:
+        if self._event_log is not None:
+            self._event_log.append(event_type, room_id=self._room_id, **fields)
+
+    def get_version(self, part: RoomPart) -> int:
+        """Counter bumped on every change of the part that viewers can see."""
+        return self._versions[part]
+
+    def get_snapshot(self) -> RoomSnapshot:
+        """The snapshot of the room, rebuilt only after a change.
+
+        The versions are read before the data, so a concurrent change can only
+        make the snapshot newer than its versions and rebuilt once more.
+        """
+        versions = (
+            self._versions[RoomPart.STATISTICS],
+            self._versions[RoomPart.QUESTIONS],
+        )
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.versions != versions:
+            # concurrent viewers may build it twice, which is cheaper than waiting
+            snapshot = RoomSnapshot.build(
+                versions,
+                self.status_counts(),
+                self.get_open_questions(),
+            )
+            self._snapshot = snapshot
+        return snapshot
+
+    def _bump_version(self, part: RoomPart) -> None:
+        # changes bump before they are logged, so that every snapshot written
+        # after an event was logged contains the change, see `SnapshotLog.write`
+        with self._versions_lock:
+            self._versions[part] += 1
+
+    def close(self) -> None:
+        """Let viewers notice that the room was removed."""
+        self._bump_version(RoomPart.METADATA)
 
     def is_host(self, session_id: str) -> bool:
         return self._host_id == session_id
 
     def update_host_last_seen(self) -> None:
-        self._host_last_seen = time.time()
+        self._host_expiry.touch(self._room_id, time.time())
 
-    def set_session_status(self, session_id: str, status: UserStatus) -> None:
-        self._sessions[session_id] = UserSession(status, time.time())
+    def add_session(self, session_id: str) -> None:
+        """Add the session with an unknown status, or reset the status of it."""
+        current_time = time.time()
+        with self._sessions_lock:
+            self._sessions.set_status(session_id, UserStatus.UNKNOWN, current_time)
+        self._bump_version(RoomPart.STATISTICS)
 
-    def get_session_status(self, session_id: str) -> UserStatus:
-        return self._sessions[session_id].status
+    def set_session_status(self, session_id: str, status: UserStatus) -> bool:
+        """Set the status unless it is set already, returns whether it changed.
+
+        Setting the current status again only marks the session as seen.
+        Sessions that are not in the room are ignored, e.g. when a stale view
+        writes after the cleanup removed the session, only joining adds it.
+        """
+        current_time = time.time()
+        with self._sessions_lock:
+            if session_id not in self._sessions:
+                return False
+            if self._sessions.get_status(session_id) is status:
+                self._sessions.touch(session_id, current_time)
+                return False
+            self._sessions.set_status(session_id, status, current_time)
+            self._bump_version(RoomPart.STATISTICS)
+            self._log("set_session_status", session_id=session_id, status=status.name)
+        return True
+
+    def sample_status_history(self) -> None:
+        if self._status_history.record(time.time(), self.status_counts()):
+            self._bump_version(RoomPart.HISTORY)
 
-    def update_session(self, session_id: str) -> None:
-        if session_id in self._sessions:
-            self._sessions[session_id].last_seen = time.time()
+    def get_status_history(self) -> tuple[StatusSample, ...]:
+        return self._status_history.samples()
 
-    def has_session(self, session_id: str) -> bool:
-        if session_id in self._sessions:
+    def get_session_status(self, session_id: str) -> UserStatus:
+        with self._sessions_lock:
+            return self._sessions.get_status(session_id)
+
+    def update_session(self, session_id: str) -> bool:
+        """Mark the session as seen, returns whether it is still in the room."""
+        current_time = time.time()
+        with self._sessions_lock:
+            if session_id not in self._sessions:
+                return False
+            self._sessions.touch(session_id, current_time)
             return True
-        return bool(self.is_host(session_id))
 
-    def __iter__(self) -> Iterator[tuple[str, UserStatus]]:
-        return ((k, v.status) for k, v in self._sessions.items())
+    def status_counts(self) -> dict[UserStatus, int]:
+        with self._sessions_lock:
+            return self._sessions.status_counts()
 
     @property
     def room_id(self) -> str:
         return self._room_id
 
-    def is_host_inactive(self, timeout_seconds: int) -> bool:
-        current_time = time.time()
-        return current_time - self._host_last_seen > timeout_seconds
+    def get_session_ids(self) -> list[str]:
+        with self._sessions_lock:
+            return [self._host_id, *self._sessions]
 
-    def remove_inactive_sessions(self, timeout_seconds: int) -> None:
-        current_time = time.time()
-        users_to_remove = [
-            session_id
-            for session_id, user_session in self._sessions.items()
-            if current_time - user_session.last_seen > timeout_seconds
-        ]
+    def remove_inactive_sessions(self, timeout_seconds: int) -> list[str]:
+        deadline = time.time() - timeout_seconds
+        with self._sessions_lock:
+            users_to_remove = self._sessions.pop_expired(deadline)
+        if users_to_remove:
+            self._bump_version(RoomPart.STATISTICS)
+        return users_to_remove
 
-        for session_id in users_to_remove:
-            del self._sessions[session_id]
+    def remove_sessions(self, session_ids: list[str]) -> None:
+        with self._sessions_lock:
+            # replayed removals may find sessions that are gone already
+            session_ids = [
+                session_id for session_id in session_ids if session_id in self._sessions
+            ]
+            self._sessions.remove(session_ids)
+        if session_ids:
+            self._bump_version(RoomPart.STATISTICS)
 
-    def get_open_questions(self) -> list[Question]:
-        open_questions = list(self._questions.values())
-        return sorted(open_questions, key=lambda q: q.vote_count, reverse=True)
+    def get_open_questions(self) -> tuple[Question, ...]:
+        """Open questions, most votes first, ties in submission order.
 
-    def add_question(self, session_id: str, text: str) -> None:
-        question_id = str(uuid.uuid4())
-        question = Question(id=question_id, text=text, voter_ids={session_id})
-        self._questions[question_id] = question
+        The ranking is cached until the next change of the questions.
+        """
+        with self._questions:
+            if self._open_questions is None:
+                self._open_questions = tuple(
+                    self._questions[question_id]
+                    for _, _, question_id in self._question_ranking
+                )
+            return self._open_questions
+
+    def add_question(
+        self,
+        session_id: str,
+        text: str,
+        question_id: str | None = None,
+    ) -> None:
+        """Add a question, `question_id` is only given when replaying events.
+
+        A replayed question that exists already is kept, as the snapshot the
+        events are replayed onto may contain it with its later votes.
+        """
+        if question_id is None:
+            question_id = str(uuid.uuid4())
+        with self._questions:
+            if question_id in self._questions:
+                return
+            participant_index = self._participant_index(session_id)
+            self._questions[question_id] = Question(
+                id=question_id,
+                text=text,
+                voters=1 << participant_index,
+                vote_count=1,
+            )
+            self._count_vote(participant_index, 1)
+            self._rank_question(question_id, (-1, next(self._question_order)))
+            self._bump_version(RoomPart.QUESTIONS)
+            self._log(
+                "add_question",
+                session_id=session_id,
+                question_id=question_id,
+                text=text,
+            )
 
     def upvote_question(self, session_id: str, question_id: str) -> None:
         with self._questions:
@@ -90,11 +373,74 @@ class Room:
                 return
 
             question = self._questions[question_id]
+            participant_index = self._participant_index(session_id)
 
-            if session_id in question.voter_ids:
+            if question.has_voter(participant_index):
                 return
 
-            question.voter_ids.add(session_id)
+            self._questions[question_id] = dataclasses.replace(
+                question,
+                voters=question.voters | 1 << participant_index,
+                vote_count=question.vote_count + 1,
+            )
+            self._count_vote(participant_index, 1)
+            neg_vote_count, order, _ = self._unrank_question(question_id)
+            self._rank_question(question_id, (neg_vote_count - 1, order))
+            self._bump_version(RoomPart.QUESTIONS)
+            self._log("upvote_question", session_id=session_id, question_id=question_id)
+
+    def has_voted(self, session_id: str, question: Question) -> bool:
+        participant_index = self._participant_indices.get(session_id)
+        return participant_index is not None and question.has_voter(participant_index)
 
     def close_question(self, question_id: str) -> None:
-        del self._questions[question_id]
+        with self._questions:
+            # e.g. closed by another view of the host already
+            question = self._questions.pop(question_id)
+            if question is None:
+                return
+            self._unrank_question(question_id)
+            for participant_index in question.voter_indices():
+                self._count_vote(participant_index, -1)
+            self._bump_version(RoomPart.QUESTIONS)
+            self._log("close_question", question_id=question_id)
+
+    def _participant_index(self, session_id: str) -> int:
+        """Index of the session in the voter bitmaps, assigned on first use."""
+        participant_index = self._participant_indices.get(session_id)
+        if participant_index is None:
+            if self._free_participant_indices:
+                # the lowest free index, so the bitmaps stay as short as possible
+                participant_index = heapq.heappop(self._free_participant_indices)
+            else:
+                participant_index = next(self._next_participant_index)
+            self._participant_indices[session_id] = participant_index
+            self._participant_votes[participant_index] = (session_id, 0)
+        return participant_index
+
+    def _count_vote(self, participant_index: int, change: int) -> None:
+        """Count votes on open questions, free the index once there are none.
+
+        No open question has the bit of a freed index set, so reusing it can't
+        give anyone else's votes to the next participant.
+        """
+        session_id, vote_count = self._participant_votes[participant_index]
+        vote_count += change
+        if vote_count:
+            self._participant_votes[participant_index] = (session_id, vote_count)
+            return
+        del self._participant_votes[participant_index]
+        del self._participant_indices[session_id]
+        heapq.heappush(self._free_participant_indices, participant_index)
+
+    def _rank_question(self, question_id: str, rank: tuple[int, int]) -> None:
+        rank_key = (*rank, question_id)
+        bisect.insort(self._question_ranking, rank_key)
+        self._question_rank_keys[question_id] = rank_key
+        self._open_questions = None
+
+    def _unrank_question(self, question_id: str) -> tuple[int, int, str]:
+        rank_key = self._question_rank_keys.pop(question_id)
+        del self._question_ranking[bisect.bisect_left(self._question_ranking, rank_key)]
+        self._open_questions = None
+        return rank_key
@@ -2,18 +2,49 @@ import uuid
 
 import streamlit as st
 
+from lecture_feedback.identity import (
+    SESSION_COOKIE_MAX_AGE_SECONDS,
+    SESSION_COOKIE_NAME,
+    sign_session_id,
+    verify_session_cookie,
+)
+
 
 class SessionState:
     """Per-user session state wrapper.
 
+    The session ID outlives the Streamlit session in a signed cookie, so a
+    reload or reconnect continues as the same participant instead of leaving
+    a ghost session behind.
+
     See https://docs.streamlit.io/develop/api-reference/caching-and-state/st.session_state
     for more details.
     """
 
     def __init__(self) -> None:
         if "session_id" not in st.session_state:
-            st.session_state.session_id = str(uuid.uuid4())
+            session_id = verify_session_cookie(
+                st.context.cookies.get(SESSION_COOKIE_NAME),
+            )
+            st.session_state.session_id = session_id or str(uuid.uuid4())
 
     @property
     def session_id(self) -> str:
         return str(st.session_state.session_id)
+
+    def persist(self) -> None:
+        """Store the session ID in the browser, unless it is stored already."""
+        # the cookies are those of the request that started the session, so
+        # they don't show a cookie written by an earlier run of this session
+        if st.session_state.get("session_cookie_written"):
+            return
+        cookie = sign_session_id(self.session_id)
+        if st.context.cookies.get(SESSION_COOKIE_NAME) != cookie:
+            st.html(
+                "<script>document.cookie ="
+                f" '{SESSION_COOKIE_NAME}={cookie}; path=/;"
+                f" max-age={SESSION_COOKIE_MAX_AGE_SECONDS}; SameSite=Lax'"
+                " + (location.protocol === 'https:' ? '; Secure' : '');</script>",
+                unsafe_allow_javascript=True,
+            )
+        st.session_state.session_cookie_written = True
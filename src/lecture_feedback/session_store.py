@@ -0,0 +1,108 @@
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Protocol
+
+from lecture_feedback.expiry_queue import ExpiryQueue
+from lecture_feedback.user_status import UserStatus
+
+
+class SessionStore(Protocol):
+    """Status and last seen time of the sessions of a room.
+
+    Stores are not thread safe, the room locks around every access.
+    """
+
+    def __contains__(self, session_id: str) -> bool: ...
+
+    def __iter__(self) -> Iterator[str]: ...
+
+    def __len__(self) -> int: ...
+
+    def get_status(self, session_id: str) -> UserStatus: ...
+
+    def set_status(
+        self,
+        session_id: str,
+        status: UserStatus,
+        timestamp: float,
+    ) -> UserStatus | None:
+        """Add or update the session, returns its previous status."""
+        ...
+
+    def touch(self, session_id: str, timestamp: float) -> None:
+        """Mark the session as seen, unknown sessions are ignored."""
+        ...
+
+    def remove(self, session_ids: Iterable[str]) -> None: ...
+
+    def pop_expired(self, deadline: float) -> list[str]:
+        """Remove and return all sessions last seen before the deadline."""
+        ...
+
+    def status_counts(self) -> dict[UserStatus, int]: ...
+
+
+@dataclass(slots=True)
+class UserSession:
+    status: UserStatus
+    last_seen: float
+
+
+class DictSessionStore:
+    """One `UserSession` per session, the statuses are counted on every change."""
+
+    def __init__(self) -> None:
+        self._sessions: dict[str, UserSession] = {}
+        self._expiry = ExpiryQueue()
+        self._status_counts = dict.fromkeys(UserStatus, 0)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._sessions))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_status(self, session_id: str) -> UserStatus:
+        return self._sessions[session_id].status
+
+    def set_status(
+        self,
+        session_id: str,
+        status: UserStatus,
+        timestamp: float,
+    ) -> UserStatus | None:
+        session = self._sessions.get(session_id)
+        previous_status = None
+        if session is None:
+            self._sessions[session_id] = UserSession(status, timestamp)
+        else:
+            previous_status = session.status
+            self._status_counts[previous_status] -= 1
+            session.status = status
+            session.last_seen = timestamp
+        self._status_counts[status] += 1
+        self._expiry.touch(session_id, timestamp)
+        return previous_status
+
+    def touch(self, session_id: str, timestamp: float) -> None:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_seen = timestamp
+            self._expiry.touch(session_id, timestamp)
+
+    def remove(self, session_ids: Iterable[str]) -> None:
+        for session_id in session_ids:
+            self._status_counts[self._sessions.pop(session_id).status] -= 1
+            self._expiry.discard(session_id)
+
+    def pop_expired(self, deadline: float) -> list[str]:
+        expired_ids = self._expiry.pop_expired(deadline)
+        for session_id in expired_ids:
+            self._status_counts[self._sessions.pop(session_id).status] -= 1
+        return expired_ids
+
+    def status_counts(self) -> dict[UserStatus, int]:
+        return self._status_counts.copy()
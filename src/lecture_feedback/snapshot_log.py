@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import contextlib
+import gc
+import json
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+from lecture_feedback.json_lines import read_json_lines
+from lecture_feedback.periodic_thread import PeriodicThread
+from lecture_feedback.room import RoomPart
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from lecture_feedback.application_state import ApplicationState
+    from lecture_feedback.room import Room, RoomRecord
+
+# compact once the log has this many times more records than there are rooms
+COMPACTION_FACTOR = 4
+MIN_RECORDS_BEFORE_COMPACTION = 1000
+
+
+class SnapshotLog:
+    """Snapshots of all rooms in an append-only JSON lines file.
+
+    Every write only appends the rooms that changed since the previous write,
+    and a removal marker for every room that is gone. The last line of a room
+    wins on restore. Once most lines are outdated, the file is rewritten with
+    one line per room.
+
+    With an event log, every write also records how many events the rooms
+    contain at least, so a restart only replays the events after them.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+        # room_id -> room versions at its last written snapshot
+        self._written_versions: dict[str, tuple[int, ...]] = {}
+        self._record_count = 0
+        # events of the event log contained in the written snapshot
+        self.event_count = 0
+        # the scheduler writes while the event log may reset the event count
+        self._lock = threading.RLock()
+
+    def restore(self, application_state: ApplicationState) -> int:
+        """Add the rooms of the log to the state, returns how many there were."""
+        if not self._path.exists():
+            return 0
+        # all objects created here live on, so collecting in between is wasted
+        with _garbage_collection_paused():
+            records: dict[str, RoomRecord] = {}
+            # an append cut short by a crash is dropped, only compaction is atomic
+            for record in read_json_lines(self._path):
+                self._record_count += 1
+                if "removed" in record:
+                    records.pop(record["removed"], None)
+                elif "event_count" in record:
+                    self.event_count = record["event_count"]
+                else:
+                    records[record["room_id"]] = cast("RoomRecord", record)
+            for room in application_state.restore_rooms(records.values()):
+                self._written_versions[room.room_id] = _get_versions(room)
+        return len(records)
+
+    def write(self, application_state: ApplicationState) -> int:
+        """Append changed and removed rooms, returns the number of lines."""
+        with self._lock:
+            # read before the rooms, every logged change is in the rooms by then
+            event_count = _get_event_count(application_state)
+            lines = []
+            current_room_ids = set()
+            for room in application_state.rooms.values():
+                current_room_ids.add(room.room_id)
+                # read before the record, so a concurrent change is written next
+                # time
+                versions = _get_versions(room)
+                if self._written_versions.get(room.room_id) != versions:
+                    lines.append(json.dumps(room.to_record()))
+                    self._written_versions[room.room_id] = versions
+            for room_id in self._written_versions.keys() - current_room_ids:
+                lines.append(json.dumps({"removed": room_id}))
+                del self._written_versions[room_id]
+            if event_count is not None and event_count != self.event_count:
+                lines.append(json.dumps({"event_count": event_count}))
+                self.event_count = event_count
+
+            if lines:
+                self._append(lines)
+            compaction_limit = max(
+                MIN_RECORDS_BEFORE_COMPACTION,
+                COMPACTION_FACTOR * len(current_room_ids),
+            )
+            if self._record_count > compaction_limit:
+                self.compact(application_state)
+            return len(lines)
+
+    def compact(self, application_state: ApplicationState) -> None:
+        """Rewrite the log with the latest snapshot of every room only."""
+        with self._lock:
+            event_count = _get_event_count(application_state)
+            self._written_versions.clear()
+            lines = []
+            for room in application_state.rooms.values():
+                self._written_versions[room.room_id] = _get_versions(room)
+                lines.append(json.dumps(room.to_record()))
+            if event_count is not None:
+                lines.append(json.dumps({"event_count": event_count}))
+                self.event_count = event_count
+            elif self.event_count:
+                lines.append(json.dumps({"event_count": self.event_count}))
+            temporary_path = self._path.with_name(f"{self._path.name}.tmp")
+            _write_lines(temporary_path, lines, "w")
+            # atomic, a crash leaves either the old or the new log behind
+            temporary_path.replace(self._path)
+            self._record_count = len(lines)
+
+    def reset_event_count(self, event_count: int) -> None:
+        """Count fewer events, once the end of the event log was lost.
+
+        Events logged from then on are numbered from the new count, so they
+        are replayed even if the process crashes before the next write.
+        """
+        with self._lock:
+            self._append([json.dumps({"event_count": event_count})])
+            self.event_count = event_count
+
+    def _append(self, lines: list[str]) -> None:
+        _write_lines(self._path, lines, "a")
+        self._record_count += len(lines)
+
+
+@contextlib.contextmanager
+def _garbage_collection_paused() -> Iterator[None]:
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _get_event_count(application_state: ApplicationState) -> int | None:
+    """Events written to the event log so far, None without an event log.
+
+    Rooms bump their versions before they log a change, so all rooms written
+    after reading the count contain the changes of all events it counts.
+    Events after the count may be contained as well, replaying them again
+    changes nothing.
+    """
+    event_log = application_state.event_log
+    if event_log is None:
+        return None
+    # otherwise the events waiting for the writer thread are replayed again
+    event_log.flush()
+    return event_log.written_count
+
+
+def _get_versions(room: Room) -> tuple[int, ...]:
+    # the status history isn't persisted
+    return tuple(
+        room.get_version(part) for part in RoomPart if part is not RoomPart.HISTORY
+    )
+
+
+def _write_lines(path: Path, lines: list[str], mode: str) -> None:
+    with path.open(mode, encoding="utf-8") as file:
+        file.writelines(f"{line}\n" for line in lines)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+class SnapshotScheduler:
+    """Writes snapshots on a background daemon thread, off the request path."""
+
+    def __init__(
+        self,
+        application_state: ApplicationState,
+        snapshot_log: SnapshotLog,
+        interval_seconds: float,
+    ) -> None:
+        self._application_state = application_state
+        self._snapshot_log = snapshot_log
+        self._thread = PeriodicThread(
+            "snapshot-scheduler",
+            self._write,
+            interval_seconds,
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop and write a last snapshot."""
+        self._thread.stop()
+        self._write()
+
+    def _write(self) -> None:
+        self._snapshot_log.write(self._application_state)
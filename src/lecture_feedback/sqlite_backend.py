@@ -0,0 +1,471 @@
+from __future__ import annotations
+
+import contextlib
+import sqlite3
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING
+
+from lecture_feedback.cleanup_scheduler import CleanupScheduler
+from lecture_feedback.qr_code import QrCodeCache
+from lecture_feedback.room import (
+    STATUS_HISTORY_INTERVAL_SECONDS,
+    Question,
+    RoomPart,
+    RoomSnapshot,
+)
+from lecture_feedback.status_history import StatusHistory
+from lecture_feedback.thread_safe_dict import ThreadSafeDict
+from lecture_feedback.user_status import UserStatus
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from lecture_feedback.status_history import StatusSample
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    room_id TEXT PRIMARY KEY,
+    host_id TEXT NOT NULL,
+    host_last_seen REAL NOT NULL,
+    statistics_version INTEGER NOT NULL DEFAULT 0,
+    questions_version INTEGER NOT NULL DEFAULT 0,
+    metadata_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS rooms_by_host ON rooms (host_id);
+CREATE INDEX IF NOT EXISTS rooms_by_host_last_seen ON rooms (host_last_seen);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    room_id TEXT NOT NULL REFERENCES rooms ON DELETE CASCADE,
+    status TEXT NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_room ON sessions (room_id);
+CREATE INDEX IF NOT EXISTS sessions_by_last_seen ON sessions (last_seen);
+
+CREATE TABLE IF NOT EXISTS questions (
+    question_order INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id TEXT NOT NULL UNIQUE,
+    room_id TEXT NOT NULL REFERENCES rooms ON DELETE CASCADE,
+    text TEXT NOT NULL,
+    vote_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_by_rank
+    ON questions (room_id, vote_count DESC, question_order);
+
+CREATE TABLE IF NOT EXISTS votes (
+    question_id TEXT NOT NULL REFERENCES questions (question_id) ON DELETE CASCADE,
+    session_id TEXT NOT NULL,
+    PRIMARY KEY (question_id, session_id)
+);
+
+CREATE TABLE IF NOT EXISTS status_samples (
+    room_id TEXT NOT NULL REFERENCES rooms ON DELETE CASCADE,
+    timestamp REAL NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (room_id, timestamp, status)
+);
+"""
+
+VERSION_QUERIES = {
+    RoomPart.STATISTICS: "SELECT statistics_version FROM rooms WHERE room_id = ?",
+    RoomPart.QUESTIONS: "SELECT questions_version FROM rooms WHERE room_id = ?",
+    RoomPart.METADATA: "SELECT metadata_version FROM rooms WHERE room_id = ?",
+    # samples are only ever added, so their number is a version
+    RoomPart.HISTORY: "SELECT (SELECT COUNT(*) FROM status_samples"
+    " WHERE status_samples.room_id = rooms.room_id) FROM rooms WHERE room_id = ?",
+}
+BUSY_TIMEOUT_SECONDS = 5.0
+
+
+def _set_session_status(
+    connection: sqlite3.Connection,
+    room_id: str,
+    session_id: str,
+    status: UserStatus,
+    *,
+    join: bool = False,
+) -> bool:
+    previous = connection.execute(
+        "SELECT room_id, status FROM sessions WHERE session_id = ?",
+        (session_id,),
+    ).fetchone()
+    if not join and (previous is None or previous[0] != room_id):
+        # like `Room.set_session_status`, only joining adds a session
+        return False
+    if previous == (room_id, status.name):
+        connection.execute(
+            "UPDATE sessions SET last_seen = ? WHERE session_id = ?",
+            (time.time(), session_id),
+        )
+        return False
+    connection.execute(
+        "INSERT INTO sessions (session_id, room_id, status, last_seen)"
+        " VALUES (?, ?, ?, ?)"
+        " ON CONFLICT (session_id) DO UPDATE SET"
+        " room_id = excluded.room_id,"
+        " status = excluded.status,"
+        " last_seen = excluded.last_seen",
+        (session_id, room_id, status.name, time.time()),
+    )
+    connection.execute(
+        "UPDATE rooms SET statistics_version = statistics_version + 1"
+        " WHERE room_id = ?",
+        (room_id,),
+    )
+    return True
+
+
+class SqliteRoom:
+    """View of one room in the database, reads and writes go straight to it."""
+
+    def __init__(
+        self,
+        backend: SqliteStateBackend,
+        room_id: str,
+        host_id: str,
+    ) -> None:
+        self._backend = backend
+        self._room_id = room_id
+        self._host_id = host_id
+
+    @property
+    def room_id(self) -> str:
+        return self._room_id
+
+    def get_version(self, part: RoomPart) -> int:
+        """Like `Room.get_version`, -1 once the room was removed."""
+        row = self._backend.execute(VERSION_QUERIES[part], (self._room_id,)).fetchone()
+        return -1 if row is None else int(row[0])
+
+    def is_host(self, session_id: str) -> bool:
+        return self._host_id == session_id
+
+    def update_host_last_seen(self) -> None:
+        self._backend.execute(
+            "UPDATE rooms SET host_last_seen = ? WHERE room_id = ?",
+            (time.time(), self._room_id),
+        )
+
+    def set_session_status(self, session_id: str, status: UserStatus) -> bool:
+        """Like `Room.set_session_status`."""
+        with self._backend.transaction() as connection:
+            return _set_session_status(connection, self._room_id, session_id, status)
+
+    def get_status_history(self) -> tuple[StatusSample, ...]:
+        """Like `Room.get_status_history`, merged the same way once it is long."""
+        status_history = StatusHistory(STATUS_HISTORY_INTERVAL_SECONDS)
+        sample_counts: dict[float, dict[UserStatus, int]] = {}
+        for timestamp, status, count in self._backend.execute(
+            "SELECT timestamp, status, count FROM status_samples"
+            " WHERE room_id = ? ORDER BY timestamp",
+            (self._room_id,),
+        ):
+            sample_counts.setdefault(timestamp, dict.fromkeys(UserStatus, 0))[
+                UserStatus[status]
+            ] = count
+        for timestamp, counts in sample_counts.items():
+            status_history.record(timestamp, counts)
+        return status_history.samples()
+
+    def get_session_status(self, session_id: str) -> UserStatus:
+        row = self._backend.execute(
+            "SELECT status FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(session_id)
+        return UserStatus[row[0]]
+
+    def update_session(self, session_id: str) -> bool:
+        updated = self._backend.execute(
+            "UPDATE sessions SET last_seen = ? WHERE session_id = ? AND room_id = ?",
+            (time.time(), session_id, self._room_id),
+        ).rowcount
+        return updated > 0
+
+    def status_counts(self) -> dict[UserStatus, int]:
+        counts = dict.fromkeys(UserStatus, 0)
+        for status, count in self._backend.execute(
+            "SELECT status, COUNT(*) FROM sessions WHERE room_id = ? GROUP BY status",
+            (self._room_id,),
+        ):
+            counts[UserStatus[status]] = count
+        return counts
+
+    def get_open_questions(self) -> tuple[Question, ...]:
+        """Open questions, most votes first, ties in submission order."""
+        rows = self._backend.execute(
+            "SELECT question_id, text, vote_count FROM questions WHERE room_id = ?"
+            " ORDER BY vote_count DESC, question_order",
+            (self._room_id,),
+        )
+        # the voters live in the votes table, see `has_voted`
+        return tuple(
+            Question(id=question_id, text=text, voters=0, vote_count=vote_count)
+            for question_id, text, vote_count in rows
+        )
+
+    def get_snapshot(self) -> RoomSnapshot:
+        """Like `Room.get_snapshot`, shared by all viewers of the process."""
+        row = self._backend.execute(
+            "SELECT statistics_version, questions_version FROM rooms WHERE room_id = ?",
+            (self._room_id,),
+        ).fetchone()
+        if row is None:
+            self._backend.snapshots.pop(self._room_id)
+            return RoomSnapshot.build((-1, -1), dict.fromkeys(UserStatus, 0), ())
+        versions = (int(row[0]), int(row[1]))
+        snapshot = self._backend.snapshots.get(self._room_id)
+        if snapshot is None or snapshot.versions != versions:
+            snapshot = RoomSnapshot.build(
+                versions,
+                self.status_counts(),
+                self.get_open_questions(),
+            )
+            self._backend.snapshots[self._room_id] = snapshot
+        return snapshot
+
+    def add_question(self, session_id: str, text: str) -> None:
+        question_id = str(uuid.uuid4())
+        with self._backend.transaction() as connection:
+            connection.execute(
+                "INSERT INTO questions (question_id, room_id, text, vote_count)"
+                " VALUES (?, ?, ?, 1)",
+                (question_id, self._room_id, text),
+            )
+            connection.execute(
+                "INSERT INTO votes (question_id, session_id) VALUES (?, ?)",
+                (question_id, session_id),
+            )
+            self._bump_questions_version(connection)
+
+    def upvote_question(self, session_id: str, question_id: str) -> None:
+        with self._backend.transaction() as connection:
+            inserted = connection.execute(
+                "INSERT OR IGNORE INTO votes (question_id, session_id)"
+                " SELECT question_id, ? FROM questions"
+                " WHERE question_id = ? AND room_id = ?",
+                (session_id, question_id, self._room_id),
+            ).rowcount
+            if not inserted:
+                return
+            connection.execute(
+                "UPDATE questions SET vote_count = vote_count + 1"
+                " WHERE question_id = ?",
+                (question_id,),
+            )
+            self._bump_questions_version(connection)
+
+    def has_voted(self, session_id: str, question: Question) -> bool:
+        row = self._backend.execute(
+            "SELECT 1 FROM votes WHERE question_id = ? AND session_id = ?",
+            (question.id, session_id),
+        ).fetchone()
+        return row is not None
+
+    def close_question(self, question_id: str) -> None:
+        with self._backend.transaction() as connection:
+            deleted = connection.execute(
+                "DELETE FROM questions WHERE question_id = ? AND room_id = ?",
+                (question_id, self._room_id),
+            ).rowcount
+            # e.g. closed by another view of the host already
+            if deleted:
+                self._bump_questions_version(connection)
+
+    def _bump_questions_version(self, connection: sqlite3.Connection) -> None:
+        connection.execute(
+            "UPDATE rooms SET questions_version = questions_version + 1"
+            " WHERE room_id = ?",
+            (self._room_id,),
+        )
+
+
+class SqliteStateBackend:
+    """Application state in an SQLite database in WAL mode.
+
+    Several worker processes on the same machine can open the same database
+    file and serve the same rooms, e.g. behind a load balancer. Every thread
+    uses its own connection.
+    """
+
+    def __init__(self, database_path: str | Path) -> None:
+        self._database_path = database_path
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self.qr_codes = QrCodeCache()
+        # room_id -> last snapshot built in this process
+        self.snapshots: ThreadSafeDict[RoomSnapshot] = ThreadSafeDict()
+        self.cleanup_scheduler: CleanupScheduler | None = None
+        self._cleanup_scheduler_lock = threading.Lock()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self._database_path,
+                timeout=BUSY_TIMEOUT_SECONDS,
+                isolation_level=None,
+                # only used by its own thread, but closed by `close`
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def close(self) -> None:
+        """Close the connections of all threads."""
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    def execute(
+        self,
+        sql: str,
+        parameters: tuple[object, ...] = (),
+    ) -> sqlite3.Cursor:
+        return self._connection().execute(sql, parameters)
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connection()
+        # take the write lock right away, so concurrent writers wait instead of
+        # failing when upgrading from a read
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def start_cleanup_scheduler(
+        self,
+        timeout_seconds: int,
+        interval_seconds: float,
+    ) -> None:
+        with self._cleanup_scheduler_lock:
+            if self.cleanup_scheduler is not None:
+                return
+            self.cleanup_scheduler = CleanupScheduler(
+                self,
+                timeout_seconds,
+                interval_seconds,
+            )
+            self.cleanup_scheduler.start()
+
+    def get_session_room(self, session_id: str) -> SqliteRoom | None:
+        row = self.execute(
+            "SELECT room_id, host_id FROM rooms WHERE host_id = ?"
+            " UNION ALL"
+            " SELECT rooms.room_id, rooms.host_id FROM sessions"
+            " JOIN rooms USING (room_id) WHERE session_id = ?",
+            (session_id, session_id),
+        ).fetchone()
+        if row is None:
+            return None
+        return SqliteRoom(self, *row)
+
+    def create_room(self, room_id: str, session_id: str) -> None:
+        self.execute(
+            "INSERT INTO rooms (room_id, host_id, host_last_seen) VALUES (?, ?, ?)",
+            (room_id, session_id, time.time()),
+        )
+
+    def join_room(self, room_id: str, session_id: str) -> None:
+        with self.transaction() as connection:
+            exists = connection.execute(
+                "SELECT 1 FROM rooms WHERE room_id = ?",
+                (room_id,),
+            ).fetchone()
+            if exists is None:
+                message = f"Room {room_id} does not exist"
+                raise ValueError(message)
+            _set_session_status(
+                connection,
+                room_id,
+                session_id,
+                UserStatus.UNKNOWN,
+                join=True,
+            )
+
+    def remove_inactive_sessions(self, timeout_seconds: int) -> int:
+        deadline = time.time() - timeout_seconds
+        with self.transaction() as connection:
+            room_ids = [
+                room_id
+                for (room_id,) in connection.execute(
+                    "DELETE FROM sessions WHERE last_seen < ? RETURNING room_id",
+                    (deadline,),
+                )
+            ]
+            connection.executemany(
+                "UPDATE rooms SET statistics_version = statistics_version + 1"
+                " WHERE room_id = ?",
+                [(room_id,) for room_id in set(room_ids)],
+            )
+        return len(room_ids)
+
+    def sample_status_histories(self) -> None:
+        """Sample the rooms whose last sample is at least an interval old.
+
+        Every worker samples, the transaction keeps them from sampling twice.
+        """
+        current_time = time.time()
+        with self.transaction() as connection:
+            room_ids = [
+                room_id
+                for (room_id,) in connection.execute(
+                    "SELECT room_id FROM rooms WHERE NOT EXISTS ("
+                    " SELECT 1 FROM status_samples"
+                    " WHERE status_samples.room_id = rooms.room_id"
+                    " AND timestamp > ?)",
+                    (current_time - STATUS_HISTORY_INTERVAL_SECONDS,),
+                )
+            ]
+            room_counts = {
+                room_id: dict.fromkeys(UserStatus, 0) for room_id in room_ids
+            }
+            for room_id, status, count in connection.execute(
+                "SELECT room_id, status, COUNT(*) FROM sessions"
+                " GROUP BY room_id, status",
+            ):
+                if room_id in room_counts:
+                    room_counts[room_id][UserStatus[status]] = count
+            connection.executemany(
+                "INSERT INTO status_samples (room_id, timestamp, status, count)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (room_id, current_time, status.name, count)
+                    for room_id, counts in room_counts.items()
+                    for status, count in counts.items()
+                ],
+            )
+
+    def remove_rooms_with_inactive_hosts(self, timeout_seconds: int) -> int:
+        deadline = time.time() - timeout_seconds
+        # sessions, questions and votes of the rooms are deleted by cascade
+        room_ids = [
+            room_id
+            for (room_id,) in self.execute(
+                "DELETE FROM rooms WHERE host_last_seen < ? RETURNING room_id",
+                (deadline,),
+            ).fetchall()
+        ]
+        for room_id in room_ids:
+            self.qr_codes.evict_room(room_id)
+            self.snapshots.pop(room_id)
+        return len(room_ids)
@@ -1,25 +1,42 @@
-import uuid
+import os
+from collections.abc import Callable, Mapping
 
 import streamlit as st
 
 from lecture_feedback.application_state import ApplicationState
-from lecture_feedback.room import Question, Room
+from lecture_feedback.backend import RoomBackend, StateBackend
+from lecture_feedback.event_log import FsyncPolicy
+from lecture_feedback.identity import warn_if_secret_is_missing
+from lecture_feedback.qr_code import QrCodeCache, QrCodeFormat
+from lecture_feedback.room import Question, RoomPart
 from lecture_feedback.session_state import SessionState
+from lecture_feedback.session_store import DictSessionStore, SessionStore
+from lecture_feedback.status_history import StatusSample
 from lecture_feedback.user_status import UserStatus
+from lecture_feedback.workers import new_room_id
+
+DATABASE_PATH_VARIABLE = "LECTURE_FEEDBACK_DATABASE"
+SNAPSHOT_PATH_VARIABLE = "LECTURE_FEEDBACK_SNAPSHOT"
+SNAPSHOT_INTERVAL_SECONDS = 5
+EVENT_LOG_PATH_VARIABLE = "LECTURE_FEEDBACK_EVENT_LOG"
+EVENT_LOG_FSYNC_VARIABLE = "LECTURE_FEEDBACK_EVENT_LOG_FSYNC"
+SESSION_STORE_VARIABLE = "LECTURE_FEEDBACK_SESSION_STORE"
 
 
 class LobbyState:
     def __init__(
         self,
-        application_state: ApplicationState,
+        application_state: StateBackend,
         session_state: SessionState,
     ) -> None:
         self._application_state = application_state
         self._session_state = session_state
 
     def create_room(self) -> None:
-        room_id = str(uuid.uuid4())
-        self._application_state.create_room(room_id, self._session_state.session_id)
+        self._application_state.create_room(
+            new_room_id(),
+            self._session_state.session_id,
+        )
 
     def join_room(self, room_id: str) -> None:
         self._application_state.join_room(room_id, self._session_state.session_id)
@@ -28,42 +45,86 @@ class LobbyState:
 class RoomState:
     def __init__(
         self,
-        room: Room,
+        room: RoomBackend,
         session_id: str,
+        qr_codes: QrCodeCache,
     ) -> None:
         self._room = room
         self._session_id = session_id
+        self._qr_codes = qr_codes
 
     @property
     def room_id(self) -> str:
         return self._room.room_id
 
-    def get_room_participants(self) -> list[tuple[str, UserStatus]]:
-        return list(self._room)
+    def get_status_counts(self) -> Mapping[UserStatus, int]:
+        return self._room.get_snapshot().status_counts
+
+    def get_participant_count(self) -> int:
+        return self._room.get_snapshot().participant_count
+
+    def get_open_questions(
+        self,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> tuple[Question, ...]:
+        """A page of the open questions, sliced from the shared snapshot."""
+        end = None if limit is None else offset + limit
+        return self._room.get_snapshot().open_questions[offset:end]
 
-    def get_open_questions(self) -> list[Question]:
-        return self._room.get_open_questions()
+    def count_open_questions(self) -> int:
+        return len(self._room.get_snapshot().open_questions)
+
+    def get_version(self, part: RoomPart) -> int:
+        return self._room.get_version(part)
+
+    def get_status_history(self) -> tuple[StatusSample, ...]:
+        return self._room.get_status_history()
+
+    def get_join_qr_code(
+        self,
+        base_url: str,
+        image_format: QrCodeFormat,
+    ) -> bytes | str:
+        return self._qr_codes.get(base_url, self._room.room_id, image_format)
 
 
 class HostState(RoomState):
-    def __init__(self, room: Room, session_id: str) -> None:
-        super().__init__(room, session_id)
+    def __init__(
+        self,
+        room: RoomBackend,
+        session_id: str,
+        qr_codes: QrCodeCache,
+    ) -> None:
+        super().__init__(room, session_id, qr_codes)
+        self.heartbeat()
+
+    def heartbeat(self) -> bool:
         self._room.update_host_last_seen()
+        return True
 
     def close_question(self, question_id: str) -> None:
         self._room.close_question(question_id)
 
 
 class ClientState(RoomState):
-    def __init__(self, room: Room, session_id: str) -> None:
-        super().__init__(room, session_id)
-        self._room.update_session(session_id)
+    def __init__(
+        self,
+        room: RoomBackend,
+        session_id: str,
+        qr_codes: QrCodeCache,
+    ) -> None:
+        super().__init__(room, session_id, qr_codes)
+        self.heartbeat()
+
+    def heartbeat(self) -> bool:
+        return self._room.update_session(self._session_id)
 
     def get_user_status(self) -> UserStatus:
         return self._room.get_session_status(self._session_id)
 
-    def set_user_status(self, status: UserStatus) -> None:
-        self._room.set_session_status(self._session_id, status)
+    def set_user_status(self, status: UserStatus) -> bool:
+        return self._room.set_session_status(self._session_id, status)
 
     def submit_question(self, text: str) -> None:
         self._room.add_question(self._session_id, text)
@@ -72,44 +133,60 @@ class ClientState(RoomState):
         self._room.upvote_question(self._session_id, question_id)
 
     def has_voted(self, question: Question) -> bool:
-        return self._session_id in question.voter_ids
-
-
-class CleanupState:
-    def __init__(
-        self,
-        application_state: ApplicationState,
-        timeout_seconds: int,
-    ) -> None:
-        self._application_state = application_state
-        self._timeout_seconds = timeout_seconds
-
-    def cleanup_all(self) -> None:
-        for room in self._application_state.rooms.values():
-            room.remove_inactive_sessions(self._timeout_seconds)
-
-        self._application_state.remove_rooms_with_inactive_hosts(
-            self._timeout_seconds,
-        )
+        return self._room.has_voted(self._session_id, question)
 
 
 class Context:
     def __init__(self) -> None:
-        self.application_state: ApplicationState = self._get_application_state()
+        self.application_state: StateBackend = self._get_application_state()
         self.session_state = SessionState()
 
     @staticmethod
     @st.cache_resource
-    def _get_application_state() -> ApplicationState:
-        return ApplicationState()
+    def _get_application_state() -> StateBackend:
+        warn_if_secret_is_missing()
+        # with a shared database, several worker processes can serve the same rooms
+        database_path = os.environ.get(DATABASE_PATH_VARIABLE)
+        if database_path:
+            from lecture_feedback.sqlite_backend import (  # noqa: PLC0415
+                SqliteStateBackend,
+            )
+
+            return SqliteStateBackend(database_path)
+        session_store_factory: Callable[[], SessionStore] = DictSessionStore
+        if os.environ.get(SESSION_STORE_VARIABLE) == "columnar":
+            # imports NumPy, which the default store doesn't need
+            from lecture_feedback.columnar_sessions import (  # noqa: PLC0415
+                ColumnarSessionStore,
+            )
+
+            session_store_factory = ColumnarSessionStore
+        application_state = ApplicationState(session_store_factory)
+        # survive restarts of the process, a database is durable anyway
+        snapshot_path = os.environ.get(SNAPSHOT_PATH_VARIABLE)
+        if snapshot_path:
+            application_state.start_snapshots(snapshot_path, SNAPSHOT_INTERVAL_SECONDS)
+        event_log_path = os.environ.get(EVENT_LOG_PATH_VARIABLE)
+        if event_log_path:
+            application_state.start_event_log(
+                event_log_path,
+                FsyncPolicy(os.environ.get(EVENT_LOG_FSYNC_VARIABLE, "interval")),
+            )
+        return application_state
 
 
 class StateProvider:
     def __init__(self) -> None:
         self.context = Context()
 
-    def get_cleanup(self, timeout_seconds: int) -> CleanupState:
-        return CleanupState(self.context.application_state, timeout_seconds)
+    def start_cleanup(self, timeout_seconds: int, interval_seconds: float) -> None:
+        self.context.application_state.start_cleanup_scheduler(
+            timeout_seconds,
+            interval_seconds,
+        )
+
+    def persist_session(self) -> None:
+        self.context.session_state.persist()
 
     def get_current(self) -> LobbyState | HostState | ClientState:
         room = self.context.application_state.get_session_room(
@@ -120,6 +197,7 @@ class StateProvider:
                 self.context.application_state,
                 self.context.session_state,
             )
+        qr_codes = self.context.application_state.qr_codes
         if room.is_host(self.context.session_state.session_id):
-            return HostState(room, self.context.session_state.session_id)
-        return ClientState(room, self.context.session_state.session_id)
+            return HostState(room, self.context.session_state.session_id, qr_codes)
+        return ClientState(room, self.context.session_state.session_id, qr_codes)
@@ -0,0 +1,89 @@
+import math
+import threading
+from array import array
+from dataclasses import dataclass
+
+from lecture_feedback.user_status import UserStatus
+
+STATUSES = tuple(UserStatus)
+
+
+@dataclass(frozen=True, slots=True)
+class StatusSample:
+    timestamp: float
+    # mean number of sessions with each status, merged samples aren't integral
+    counts: dict[UserStatus, float]
+
+
+class StatusHistory:
+    """Status counts of a room over time in constant memory.
+
+    Samples are kept in a preallocated array of `capacity` rows. Once it is
+    full, every two neighbouring samples are merged into their mean and samples
+    are taken half as often from then on, so the history always covers the
+    whole lecture, with a resolution that drops the longer it runs.
+    """
+
+    def __init__(self, sample_interval_seconds: float, capacity: int = 120) -> None:
+        if capacity < 2:  # noqa: PLR2004
+            message = "A status history needs room for at least two samples"
+            raise ValueError(message)
+        self._sample_interval_seconds = sample_interval_seconds
+        self._capacity = capacity
+        # every row is the timestamp followed by the count of each status
+        self._row_size = 1 + len(STATUSES)
+        self._rows = array("d", bytes(capacity * self._row_size * 8))
+        self._row_count = 0
+        self._next_sample_time = -math.inf
+        self._lock = threading.Lock()
+
+    def record(self, timestamp: float, counts: dict[UserStatus, int]) -> bool:
+        """Sample the counts, unless the last sample is too recent."""
+        with self._lock:
+            if timestamp < self._next_sample_time:
+                return False
+            if self._row_count == self._capacity:
+                self._downsample()
+            offset = self._row_count * self._row_size
+            self._rows[offset] = timestamp
+            for index, status in enumerate(STATUSES, start=1):
+                self._rows[offset + index] = counts[status]
+            self._row_count += 1
+            self._next_sample_time = timestamp + self._sample_interval_seconds
+            return True
+
+    def samples(self) -> tuple[StatusSample, ...]:
+        with self._lock:
+            rows = [
+                self._rows[offset : offset + self._row_size]
+                for offset in range(0, self._row_count * self._row_size, self._row_size)
+            ]
+        return tuple(
+            StatusSample(row[0], dict(zip(STATUSES, row[1:], strict=True)))
+            for row in rows
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._row_count
+
+    def _downsample(self) -> None:
+        for target_row in range(self._row_count // 2):
+            target = target_row * self._row_size
+            first = 2 * target
+            second = first + self._row_size
+            # a merged sample starts where the first of the two started
+            self._rows[target] = self._rows[first]
+            for index in range(1, self._row_size):
+                self._rows[target + index] = (
+                    self._rows[first + index] + self._rows[second + index]
+                ) / 2
+        if self._row_count % 2:
+            # the last sample of an odd capacity has no neighbour to merge with
+            last = (self._row_count - 1) * self._row_size
+            target = self._row_count // 2 * self._row_size
+            self._rows[target : target + self._row_size] = self._rows[
+                last : last + self._row_size
+            ]
+        self._row_count = (self._row_count + 1) // 2
+        self._sample_interval_seconds *= 2
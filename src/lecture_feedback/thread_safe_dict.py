@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+import itertools
 import threading
 from typing import TYPE_CHECKING, Any, Self
 
 if TYPE_CHECKING:
-    from collections.abc import ItemsView, Iterator, ValuesView
+    from collections.abc import ItemsView, Iterator, Mapping, Sequence, ValuesView
 
 
 class ThreadSafeDict[T]:
@@ -16,6 +17,10 @@ class ThreadSafeDict[T]:
         with self._lock:
             return self._data[key]
 
+    def get(self, key: str, default: T | None = None) -> T | None:
+        with self._lock:
+            return self._data.get(key, default)
+
     def __setitem__(self, key: str, value: T) -> None:
         with self._lock:
             self._data[key] = value
@@ -24,6 +29,14 @@ class ThreadSafeDict[T]:
         with self._lock:
             del self._data[key]
 
+    def pop(self, key: str, default: T | None = None) -> T | None:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def update(self, entries: Mapping[str, T]) -> None:
+        with self._lock:
+            self._data.update(entries)
+
     def __iter__(self) -> Iterator[str]:
         with self._lock:
             return iter(list(self._data))  # safe copy, in contrast to normal dict
@@ -55,3 +68,124 @@ class ThreadSafeDict[T]:
     def values(self) -> ValuesView[T]:
         with self._lock:
             return self._data.copy().values()
+
+
+class CopyOnWriteDict[T]:
+    """Read-optimised variant of ThreadSafeDict.
+
+    Writers copy the dict under a lock and then publish the copy, so a
+    published dict is never mutated. Readers use the currently published dict
+    without locking or copying. Writes cost O(n), so use it for data that is
+    read far more often than written.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        self._lock = threading.RLock()
+        self._data: dict[str, T] = dict(*args, **kwargs)
+
+    def __getitem__(self, key: str) -> T:
+        return self._data[key]
+
+    def get(self, key: str, default: T | None = None) -> T | None:
+        return self._data.get(key, default)
+
+    def __setitem__(self, key: str, value: T) -> None:
+        with self._lock:
+            data = self._data.copy()
+            data[key] = value
+            self._data = data
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            data = self._data.copy()
+            del data[key]
+            self._data = data
+
+    def update(self, entries: Mapping[str, T]) -> None:
+        """Publish all entries with a single copy."""
+        with self._lock:
+            self._data = {**self._data, **entries}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __enter__(self) -> Self:
+        """Lock out other writers, readers are not blocked."""
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self._lock.release()
+
+    def copy(self) -> CopyOnWriteDict[T]:
+        """Return a shallow copy as a CopyOnWriteDict instance."""
+        return CopyOnWriteDict(self._data)
+
+    def items(self) -> ItemsView[str, T]:
+        return self._data.items()
+
+    def values(self) -> ValuesView[T]:
+        return self._data.values()
+
+
+class ShardedDict[T]:
+    """Dict split into CopyOnWriteDict shards by the hash of the key.
+
+    Writers only lock the shard of their key, so writes to different shards
+    don't wait for each other. Use `shard(key)` as context manager for atomic
+    operations on a key, and iterate `shards` to work through all entries
+    shard by shard.
+    """
+
+    def __init__(self, shard_count: int = 16) -> None:
+        self._shards: tuple[CopyOnWriteDict[T], ...] = tuple(
+            CopyOnWriteDict() for _ in range(shard_count)
+        )
+
+    @property
+    def shards(self) -> Sequence[CopyOnWriteDict[T]]:
+        return self._shards
+
+    def shard(self, key: str) -> CopyOnWriteDict[T]:
+        return self._shards[self._shard_index(key)]
+
+    def _shard_index(self, key: str) -> int:
+        return hash(key) % len(self._shards)
+
+    def __getitem__(self, key: str) -> T:
+        return self.shard(key)[key]
+
+    def get(self, key: str, default: T | None = None) -> T | None:
+        return self.shard(key).get(key, default)
+
+    def __setitem__(self, key: str, value: T) -> None:
+        self.shard(key)[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self.shard(key)[key]
+
+    def update(self, entries: Mapping[str, T]) -> None:
+        """Add the entries with a single copy per shard."""
+        shard_entries: dict[int, dict[str, T]] = {}
+        for key, value in entries.items():
+            shard_entries.setdefault(self._shard_index(key), {})[key] = value
+        for shard_index, entries_of_shard in shard_entries.items():
+            self._shards[shard_index].update(entries_of_shard)
+
+    def __iter__(self) -> Iterator[str]:
+        return itertools.chain.from_iterable(self._shards)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.shard(key)
+
+    def values(self) -> Iterator[T]:
+        return itertools.chain.from_iterable(shard.values() for shard in self._shards)
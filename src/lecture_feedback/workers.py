@@ -0,0 +1,78 @@
+"""Room affinity when running several independent worker processes.
+
+Every worker prefixes the IDs of the rooms it creates with its index, so the
+router can send everyone joining a room to the worker that owns it, and the
+workers don't have to share any state.
+"""
+
+import itertools
+import os
+import threading
+import uuid
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+WORKER_ID_VARIABLE = "LECTURE_FEEDBACK_WORKER_ID"
+WORKER_COUNT_VARIABLE = "LECTURE_FEEDBACK_WORKER_COUNT"
+PUBLIC_URL_VARIABLE = "LECTURE_FEEDBACK_PUBLIC_URL"
+ROOM_ID_SEPARATOR = "."
+
+
+def new_room_id() -> str:
+    room_id = str(uuid.uuid4())
+    worker_id = os.environ.get(WORKER_ID_VARIABLE)
+    if worker_id:
+        return f"{worker_id}{ROOM_ID_SEPARATOR}{room_id}"
+    return room_id
+
+
+def get_public_url() -> str | None:
+    """URL of the router, which participants use to join instead of the worker."""
+    return os.environ.get(PUBLIC_URL_VARIABLE) or None
+
+
+def get_worker_index(room_id: str, worker_count: int) -> int | None:
+    prefix, separator, _ = room_id.partition(ROOM_ID_SEPARATOR)
+    if not separator or not prefix.isdigit():
+        return None
+    worker_index = int(prefix)
+    return worker_index if worker_index < worker_count else None
+
+
+def get_other_worker_join_url(room_id: str) -> str | None:
+    """URL to join the room through the router, if another worker owns it.
+
+    None if this worker owns the room or doesn't run behind a router.
+    """
+    worker_id = os.environ.get(WORKER_ID_VARIABLE)
+    worker_count = os.environ.get(WORKER_COUNT_VARIABLE)
+    public_url = get_public_url()
+    if not worker_id or not worker_count or public_url is None:
+        return None
+    worker_index = get_worker_index(room_id, int(worker_count))
+    if worker_index is None or worker_index == int(worker_id):
+        return None
+    return f"{public_url}?{urlencode({'room_id': room_id})}"
+
+
+class WorkerRouter:
+    """Picks the worker for a request by the room ID in its query.
+
+    Requests without a known room, e.g. of hosts about to create a room, are
+    spread round robin.
+    """
+
+    def __init__(self, worker_urls: list[str]) -> None:
+        self._worker_urls = [worker_url.rstrip("/") for worker_url in worker_urls]
+        self._next_worker_index = itertools.cycle(range(len(worker_urls)))
+        self._lock = threading.Lock()
+
+    def route(self, path: str) -> str:
+        """Worker URL for the path with query of a request to the router."""
+        room_ids = parse_qs(urlsplit(path).query).get("room_id", [])
+        worker_index = None
+        if room_ids:
+            worker_index = get_worker_index(room_ids[0], len(self._worker_urls))
+        if worker_index is None:
+            with self._lock:
+                worker_index = next(self._next_worker_index)
+        return self._worker_urls[worker_index] + path
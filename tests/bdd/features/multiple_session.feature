@@ -25,3 +25,10 @@ Feature: Multiple sessions
     And a third user creates another room
     And the second user selects the status "🟢 Green"
     Then "me, second_user" should see status "🟢 Green"
+
+  Scenario: User changes their status again
+    Given I host a room
+    When a second user joins the room
+    And the second user selects the status "🔴 Red"
+    And the second user selects the status "🟢 Green"
+    Then "me, second_user" should see status "🟢 Green"
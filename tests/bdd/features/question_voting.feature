@@ -11,3 +11,11 @@ Feature: Question Voting
     Then "me, second_user, third_user" should see question "How does this work?" with 2 votes
     When I close the question
     Then "me, second_user, third_user" should see no questions
+
+  Scenario: Many questions are shown page by page
+    Given I host a room
+    When a second user joins the room
+    And the second user submits 12 questions
+    Then I should see 10 questions
+    When I click "Show more questions"
+    Then I should see 12 questions
@@ -8,6 +8,13 @@ Feature: Room cleanup
     And a given timeout has passed
     Then I should see info message "No participants yet. Share the Room ID to get started!"
 
+  Scenario: Reloading user continues their session
+    Given I host a room
+    When a second user joins the room
+    And the second user reloads the page
+    Then there should be 1 participant in my room
+    And the second user should still be in my room
+
   Scenario: Room host disconnects
     Given I host a room
     When a second user joins the room
@@ -1,14 +1,15 @@
 from typing import TYPE_CHECKING
 
-import pandas as pd
 import pytest
+from streamlit.runtime.context import ContextProxy
 from streamlit.testing.v1 import AppTest
 
-from lecture_feedback.app import get_statistics_data_frame
+from lecture_feedback.app import get_statistics
 from lecture_feedback.state_provider import Context, RoomState
+from lecture_feedback.user_status import UserStatus
 
 if TYPE_CHECKING:
-    from lecture_feedback.application_state import ApplicationState
+    from lecture_feedback.backend import StateBackend
 
 
 def run_wrapper() -> None:
@@ -26,8 +27,8 @@ def context() -> dict[str, AppTest]:
 
 class CapturedData:
     def __init__(self) -> None:
-        self.room_data: dict[str, pd.DataFrame] = {}
-        self.application_state: None | ApplicationState = None
+        self.room_data: dict[str, dict[UserStatus, int]] = {}
+        self.application_state: None | StateBackend = None
 
 
 captured = CapturedData()
@@ -36,19 +37,25 @@ captured = CapturedData()
 @pytest.fixture(autouse=True)
 def capture_stats(monkeypatch: pytest.MonkeyPatch) -> None:
     captured.room_data.clear()
-    original_func = get_statistics_data_frame
+    original_func = get_statistics
 
-    def capture_wrapper(room: RoomState) -> pd.DataFrame:
-        df = original_func(room)
-        captured.room_data[room.room_id] = df
-        return df
+    def capture_wrapper(room: RoomState) -> dict[UserStatus, int]:
+        statistics = original_func(room)
+        captured.room_data[room.room_id] = statistics
+        return statistics
 
     monkeypatch.setattr(
-        "lecture_feedback.app.get_statistics_data_frame",
+        "lecture_feedback.app.get_statistics",
         capture_wrapper,
     )
 
 
+@pytest.fixture(autouse=True)
+def fresh_application_state() -> None:
+    # Every scenario starts with an empty server, as if the app was just deployed
+    Context._get_application_state.clear()  # noqa: SLF001
+
+
 @pytest.fixture(autouse=True)
 def capture_application_state(monkeypatch: pytest.MonkeyPatch) -> None:
     original_init = Context.__init__
@@ -58,3 +65,11 @@ def capture_application_state(monkeypatch: pytest.MonkeyPatch) -> None:
         captured.application_state = context.application_state
 
     monkeypatch.setattr(Context, "__init__", wrapped_init)
+
+
+@pytest.fixture(autouse=True)
+def browser_cookies(monkeypatch: pytest.MonkeyPatch) -> dict[str, str]:
+    # AppTest has no browser, the cookies would be mocks otherwise
+    cookies: dict[str, str] = {}
+    monkeypatch.setattr(ContextProxy, "cookies", property(lambda _: cookies))
+    return cookies
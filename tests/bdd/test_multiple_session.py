@@ -26,6 +26,11 @@ def test_three_users_in_two_separate_rooms_maintain_independent_statistics() ->
     pass
 
 
+@scenario("features/multiple_session.feature", "User changes their status again")
+def test_user_changes_their_status_again() -> None:
+    pass
+
+
 @when("a second user wants to join with invalid URL")
 def second_user_wants_to_join_with_invalid_url(context: dict[str, AppTest]) -> None:
     context["second_user"] = AppTest.from_function(run_wrapper)
@@ -69,6 +74,5 @@ def users_should_see_status(
 
     for user in user_keys:
         room_id = get_room_id(context[user])
-        df = captured.room_data[room_id]
-        actual_count = df[status].iloc[0]
+        actual_count = captured.room_data[room_id][UserStatus(status)]
         assert actual_count == 1, f"{user}, {status}, actual_count: {actual_count}"
@@ -10,6 +10,11 @@ def test_client_submits_a_question() -> None:
     pass
 
 
+@scenario("features/question_voting.feature", "Many questions are shown page by page")
+def test_many_questions_are_shown_page_by_page() -> None:
+    pass
+
+
 @when(parsers.parse('the second user submits a question "{question}"'))
 def second_user_submits_question(context: dict[str, AppTest], question: str) -> None:
     context["second_user"].text_area(key="question_input").set_value(question).run()
@@ -107,3 +112,26 @@ def users_should_see_no_questions(context: dict[str, AppTest], users: str) -> No
         assert len(close_buttons) == 0, f"{user} still sees close buttons"
 
         check_page_contents(app, expected=("No questions yet.",))
+
+
+@when(parsers.parse("the second user submits {count:d} questions"))
+def second_user_submits_questions(context: dict[str, AppTest], count: int) -> None:
+    for index in range(count):
+        context["second_user"].text_area(key="question_input").set_value(
+            f"Question {index}",
+        ).run()
+        context["second_user"].button(key="submit_question").click().run()
+    refresh_all_apps(context)
+
+
+@then(parsers.parse("I should see {count:d} questions"))
+def i_should_see_questions(context: dict[str, AppTest], count: int) -> None:
+    close_buttons = [
+        btn for btn in context["me"].button if btn.key and btn.key.startswith("close_")
+    ]
+    assert len(close_buttons) == count
+
+
+@when('I click "Show more questions"')
+def i_click_show_more_questions(context: dict[str, AppTest]) -> None:
+    context["me"].button(key="show_more_questions").click().run()
@@ -2,7 +2,15 @@ import pytest
 from pytest_bdd import parsers, scenario, then, when
 from streamlit.testing.v1 import AppTest
 
-from tests.bdd.test_helper import get_info_content, get_page_content
+from lecture_feedback.cleanup_scheduler import CleanupScheduler
+from lecture_feedback.identity import SESSION_COOKIE_NAME, sign_session_id
+from tests.bdd.fixture import captured, run_wrapper
+from tests.bdd.test_helper import (
+    get_info_content,
+    get_page_content,
+    get_room_id,
+    refresh_all_apps,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -20,6 +28,14 @@ def test_disconnected_user_is_removed_from_user_status_after_timeout() -> None:
     pass
 
 
+@scenario(
+    "features/room_cleanup.feature",
+    "Reloading user continues their session",
+)
+def test_reloading_user_continues_their_session() -> None:
+    pass
+
+
 @scenario(
     "features/room_cleanup.feature",
     "Room host disconnects",
@@ -41,6 +57,24 @@ def second_user_closes_their_session(context: dict[str, AppTest]) -> None:
     del context["second_user"]  # prevent running second user further
 
 
+@when("the second user reloads the page")
+def second_user_reloads_the_page(
+    context: dict[str, AppTest],
+    browser_cookies: dict[str, str],
+) -> None:
+    # the browser keeps the cookie, but the Streamlit session starts over
+    session_id = context["second_user"].session_state["session_id"]
+    browser_cookies[SESSION_COOKIE_NAME] = sign_session_id(session_id)
+    context["second_user"] = AppTest.from_function(run_wrapper)
+    context["second_user"].run()
+    refresh_all_apps(context)
+
+
+@then("the second user should still be in my room")
+def second_user_should_still_be_in_my_room(context: dict[str, AppTest]) -> None:
+    assert get_room_id(context["second_user"]) == get_room_id(context["me"])
+
+
 @when("I close my session")
 def i_close_my_session(context: dict[str, AppTest]) -> None:
     del context["me"]  # prevent running me further
@@ -59,15 +93,21 @@ def given_timeout_has_passed(
 ) -> None:
     time_to_pass = 5
     step_time = 2
-    # patch this in any case to be independent of the production value
-    monkeypatch.setattr("lecture_feedback.app.USER_REMOVAL_TIMEOUT_SECONDS", 3)
+    assert captured.application_state is not None
+    # sweep by hand to be independent of the production timeout and interval
+    cleanup_scheduler = CleanupScheduler(
+        captured.application_state,
+        timeout_seconds=3,
+        interval_seconds=step_time,
+    )
 
     for current_time in range(0, time_to_pass, step_time):
+        monkeypatch.setattr(
+            "lecture_feedback.room.time.time",
+            lambda current_time=current_time: current_time,
+        )
+        cleanup_scheduler.sweep()
         for user in context.values():
-            monkeypatch.setattr(
-                "lecture_feedback.room.time.time",
-                lambda current_time=current_time: current_time,
-            )
             user.run()
 
 
@@ -1,6 +1,7 @@
 from pytest_bdd import parsers, scenario, then, when
 from streamlit.testing.v1 import AppTest
 
+from lecture_feedback.user_status import UserStatus
 from tests.bdd.fixture import captured
 from tests.bdd.test_helper import get_room_id
 
@@ -81,7 +82,7 @@ def my_status_should_be(context: dict[str, AppTest], status: str) -> None:
     assert len(plotly_charts) > 0, "No plotly chart found"
 
     room_id = get_room_id(context["me"])
-    df = captured.room_data[room_id]
-    assert captured.room_data[room_id] is not None, "No dataframe was captured"
-    count = df[status].iloc[0]
+    statistics = captured.room_data[room_id]
+    assert statistics is not None, "No statistics were captured"
+    count = statistics[UserStatus(status)]
     assert count >= 1, f"Expected at least 1 user with status '{status}', found {count}"
@@ -0,0 +1,156 @@
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from lecture_feedback.app import (
+    build_status_trend_figure,
+    keep_session_alive,
+    show_active_room_header,
+    show_open_questions,
+    show_status_trend,
+    statistics_figure,
+    watch_room_changes,
+)
+from lecture_feedback.qr_code import QrCodeCache
+from lecture_feedback.room import STATUS_HISTORY_INTERVAL_SECONDS, Room, RoomPart
+from lecture_feedback.state_provider import ClientState, HostState
+from lecture_feedback.user_status import UserStatus
+from lecture_feedback.workers import (
+    PUBLIC_URL_VARIABLE,
+    WORKER_COUNT_VARIABLE,
+    WORKER_ID_VARIABLE,
+)
+from tests.bdd.fixture import run_wrapper
+
+
+class RerunRequestedError(Exception):
+    pass
+
+
+def test_watcher_reruns_app_until_room_is_rendered_and_once_it_was_removed(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def rerun() -> None:
+        raise RerunRequestedError
+
+    monkeypatch.setattr(st, "rerun", rerun)
+    st.session_state.clear()
+    room = Room("room-id", "host-id")
+    host_state = HostState(room, "host-id", QrCodeCache())
+    # call the fragment body directly, as it would run on a periodic refresh
+    with pytest.raises(RerunRequestedError):
+        watch_room_changes.__wrapped__(host_state, (RoomPart.METADATA,))  # type: ignore[attr-defined]
+
+    show_active_room_header(host_state)
+    watch_room_changes.__wrapped__(host_state, (RoomPart.METADATA,))  # type: ignore[attr-defined]
+    room.close()
+    with pytest.raises(RerunRequestedError):
+        watch_room_changes.__wrapped__(host_state, (RoomPart.METADATA,))  # type: ignore[attr-defined]
+
+
+def test_watcher_ignores_changes_the_session_rendered_already(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def rerun() -> None:
+        raise RerunRequestedError
+
+    monkeypatch.setattr(st, "rerun", rerun)
+    st.session_state.clear()
+    room = Room("room-id", "host-id")
+    room.add_session("user-1")
+    client_state = ClientState(room, "user-1", QrCodeCache())
+    show_open_questions.__wrapped__(client_state)  # type: ignore[attr-defined]
+
+    room.add_question("user-2", "Question text")
+    with pytest.raises(RerunRequestedError):
+        watch_room_changes.__wrapped__(client_state, (RoomPart.QUESTIONS,))  # type: ignore[attr-defined]
+
+    # e.g. after a vote of the session, which only reruns the questions
+    show_open_questions.__wrapped__(client_state)  # type: ignore[attr-defined]
+    watch_room_changes.__wrapped__(client_state, (RoomPart.QUESTIONS,))  # type: ignore[attr-defined]
+
+
+def test_status_trend_is_shown_once_two_samples_were_taken(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    plotted: list[object] = []
+    monkeypatch.setattr(st, "plotly_chart", lambda fig, **_: plotted.append(fig))
+    room = Room("room-id", "host-id")
+    host_state = HostState(room, "host-id", QrCodeCache())
+    assert build_status_trend_figure(host_state.get_status_history()) is None
+
+    for now in (0, STATUS_HISTORY_INTERVAL_SECONDS):
+        monkeypatch.setattr("lecture_feedback.room.time.time", lambda now=now: now)
+        room.sample_status_history()
+    show_status_trend(host_state)
+
+    (fig,) = plotted
+    assert fig is not None
+
+
+def test_heartbeat_keeps_session_alive(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    room = Room("room-id", "host-id")
+    room.add_session("user-1")
+    client_state = ClientState(room, "user-1", QrCodeCache())
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    keep_session_alive.__wrapped__(client_state)  # type: ignore[attr-defined]
+
+    assert room.remove_inactive_sessions(5) == []
+
+
+def test_heartbeat_reruns_app_once_session_was_removed(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def rerun() -> None:
+        raise RerunRequestedError
+
+    monkeypatch.setattr(st, "rerun", rerun)
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    room = Room("room-id", "host-id")
+    room.add_session("user-1")
+    client_state = ClientState(room, "user-1", QrCodeCache())
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    assert room.remove_inactive_sessions(5) == ["user-1"]
+    with pytest.raises(RerunRequestedError):
+        keep_session_alive.__wrapped__(client_state)  # type: ignore[attr-defined]
+    assert room.get_snapshot().participant_count == 0
+
+
+def test_statistics_figures_are_built_per_render_from_shared_data() -> None:
+    statistics = dict(zip(UserStatus, [1, 2, 0, 3], strict=True))
+    fig = statistics_figure(statistics)
+    assert [trace.y for trace in fig.data] == [(1,), (2,), (0,), (3,)]
+
+    # changing one figure doesn't change the figures of other renders
+    fig.data[0].y = [5]
+    other_fig = statistics_figure(statistics)
+    assert other_fig is not fig
+    assert other_fig.data[0].y == (1,)
+
+
+def test_lobby_sends_joins_of_other_workers_rooms_to_router(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv(WORKER_ID_VARIABLE, "0")
+    monkeypatch.setenv(WORKER_COUNT_VARIABLE, "2")
+    monkeypatch.setenv(PUBLIC_URL_VARIABLE, "http://router/")
+    application = AppTest.from_function(run_wrapper)
+    application.run()
+
+    application.text_input(key="join_room_id").set_value("1.abc")
+    application.button(key="join_room").click().run()
+
+    assert not application.error
+    assert "http://router/?room_id=1.abc" in application.info[0].value
+
+
+def test_session_cookie_is_written_on_the_first_run_only() -> None:
+    application = AppTest.from_function(run_wrapper)
+    application.run()
+    assert len(application.get("html")) == 1
+
+    application.run()
+    assert not application.get("html")
@@ -0,0 +1,141 @@
+import pytest
+
+from lecture_feedback.application_state import ApplicationState
+from lecture_feedback.user_status import UserStatus
+
+
+def test_get_session_room_returns_none_for_unknown_session() -> None:
+    application_state = ApplicationState()
+    assert application_state.get_session_room("unknown-id") is None
+
+
+def test_host_and_participants_are_mapped_to_their_room() -> None:
+    application_state = ApplicationState()
+    application_state.create_room("room-1", "host-1")
+    application_state.create_room("room-2", "host-2")
+    application_state.join_room("room-2", "user-1")
+
+    room_1 = application_state.get_session_room("host-1")
+    room_2 = application_state.get_session_room("user-1")
+    assert room_1 is not None
+    assert room_1.room_id == "room-1"
+    assert room_2 is not None
+    assert room_2.room_id == "room-2"
+    assert application_state.get_session_room("host-2") is room_2
+
+
+def test_join_nonexistent_room_does_not_register_session() -> None:
+    application_state = ApplicationState()
+    with pytest.raises(ValueError, match="does not exist"):
+        application_state.join_room("room-1", "user-1")
+    assert application_state.get_session_room("user-1") is None
+
+
+def test_inactive_sessions_are_removed_from_index(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    application_state = ApplicationState()
+    application_state.create_room("room-1", "host-1")
+    application_state.join_room("room-1", "user-1")
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    application_state.join_room("room-1", "user-2")
+    application_state.remove_inactive_sessions(5)
+
+    assert application_state.get_session_room("user-1") is None
+    assert application_state.get_session_room("user-2") is not None
+    assert application_state.get_session_room("host-1") is not None
+
+
+def test_removed_room_drops_all_its_sessions_from_index(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    application_state = ApplicationState()
+    application_state.create_room("room-1", "host-1")
+    application_state.join_room("room-1", "user-1")
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    application_state.create_room("room-2", "host-2")
+    application_state.remove_rooms_with_inactive_hosts(5)
+
+    assert application_state.get_session_room("host-1") is None
+    assert application_state.get_session_room("user-1") is None
+    assert application_state.get_session_room("host-2") is not None
+    assert "room-1" not in application_state.rooms
+
+
+def test_stale_host_view_does_not_break_cleanup(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    application_state = ApplicationState()
+    application_state.create_room("room-1", "host-1")
+    room = application_state.rooms["room-1"]
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    assert application_state.remove_rooms_with_inactive_hosts(5) == 1
+
+    room.update_host_last_seen()
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 20)
+    assert application_state.remove_rooms_with_inactive_hosts(5) == 0
+
+
+def test_stale_client_view_does_not_bring_back_removed_session(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    application_state = ApplicationState()
+    application_state.create_room("room-1", "host-1")
+    application_state.join_room("room-1", "user-1")
+    # a view of the session, built just before the sweep
+    room = application_state.rooms["room-1"]
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    assert application_state.remove_inactive_sessions(5) == 1
+    assert not room.set_session_status("user-1", UserStatus.GREEN)
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 20)
+    assert application_state.remove_inactive_sessions(5) == 0
+    assert room.get_session_ids() == ["host-1"]
+    assert application_state.get_session_room("user-1") is None
+
+
+def test_expired_session_keeps_index_of_room_joined_since(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    application_state = ApplicationState()
+    application_state.create_room("room-1", "host-1")
+    application_state.create_room("room-2", "host-2")
+    application_state.join_room("room-1", "user-1")
+    application_state.join_room("room-2", "user-1")
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    application_state.rooms["room-2"].update_session("user-1")
+    assert application_state.remove_inactive_sessions(5) == 1
+
+    room = application_state.get_session_room("user-1")
+    assert room is not None
+    assert room.room_id == "room-2"
+
+
+def test_locked_shard_does_not_block_other_shards() -> None:
+    application_state = ApplicationState()
+    room_ids = [f"room-{index}" for index in range(100)]
+    for room_id in room_ids:
+        application_state.create_room(room_id, f"host-{room_id}")
+    locked_shard = application_state.rooms.shard("room-0")
+    other_room_id = next(
+        room_id
+        for room_id in room_ids
+        if application_state.rooms.shard(room_id) is not locked_shard
+    )
+
+    with locked_shard:
+        application_state.join_room(other_room_id, "user-1")
+
+    room = application_state.get_session_room("user-1")
+    assert room is not None
+    assert room.room_id == other_room_id
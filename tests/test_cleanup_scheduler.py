@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from lecture_feedback.application_state import ApplicationState
+from lecture_feedback.cleanup_scheduler import CleanupScheduler
+
+
+def test_sweep_records_evictions(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    application_state = ApplicationState()
+    application_state.create_room("room-1", "host-1")
+    application_state.join_room("room-1", "user-1")
+    application_state.create_room("room-2", "host-2")
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    application_state.rooms["room-2"].update_host_last_seen()
+    cleanup_scheduler = CleanupScheduler(
+        application_state,
+        timeout_seconds=5,
+        interval_seconds=60,
+    )
+    cleanup_scheduler.sweep()
+
+    metrics = cleanup_scheduler.metrics
+    assert metrics.sweep_count == 1
+    assert metrics.sessions_evicted == 1
+    assert metrics.rooms_evicted == 1
+    assert metrics.last_sweep_duration_seconds >= 0
+    assert metrics.total_sweep_duration_seconds == (metrics.last_sweep_duration_seconds)
+    assert list(application_state.rooms) == ["room-2"]
+
+
+def test_scheduler_sweeps_in_background() -> None:
+    application_state = ApplicationState()
+    cleanup_scheduler = CleanupScheduler(
+        application_state,
+        timeout_seconds=60,
+        interval_seconds=0.01,
+    )
+    cleanup_scheduler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while cleanup_scheduler.metrics.sweep_count == 0:
+            assert time.monotonic() < deadline, "No sweep happened in time"
+            time.sleep(0.01)
+    finally:
+        cleanup_scheduler.stop()
+
+
+def test_scheduler_keeps_sweeping_after_a_failed_sweep(
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    application_state = ApplicationState()
+    remove_inactive_sessions = application_state.remove_inactive_sessions
+    calls = []
+
+    def fail_once(timeout_seconds: int) -> int:
+        calls.append(timeout_seconds)
+        if len(calls) == 1:
+            raise KeyError(timeout_seconds)
+        return remove_inactive_sessions(timeout_seconds)
+
+    monkeypatch.setattr(application_state, "remove_inactive_sessions", fail_once)
+    cleanup_scheduler = CleanupScheduler(
+        application_state,
+        timeout_seconds=60,
+        interval_seconds=0.01,
+    )
+    cleanup_scheduler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while cleanup_scheduler.metrics.sweep_count == 0:
+            assert time.monotonic() < deadline, "No sweep happened after the failure"
+            time.sleep(0.01)
+    finally:
+        cleanup_scheduler.stop()
+
+    assert "Periodic task of cleanup-scheduler failed" in caplog.text
+
+
+def test_application_state_starts_scheduler_only_once() -> None:
+    application_state = ApplicationState()
+    application_state.start_cleanup_scheduler(60, 60)
+    cleanup_scheduler = application_state.cleanup_scheduler
+    assert cleanup_scheduler is not None
+
+    application_state.start_cleanup_scheduler(60, 60)
+    assert application_state.cleanup_scheduler is cleanup_scheduler
+    cleanup_scheduler.stop()
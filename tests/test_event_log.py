@@ -0,0 +1,259 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from lecture_feedback.application_state import ApplicationState
+from lecture_feedback.event_log import EventLog, FsyncPolicy, replay_events
+from lecture_feedback.room import RoomRecord
+from lecture_feedback.snapshot_log import SnapshotLog
+from lecture_feedback.state_provider import (
+    EVENT_LOG_FSYNC_VARIABLE,
+    EVENT_LOG_PATH_VARIABLE,
+    Context,
+)
+from lecture_feedback.user_status import UserStatus
+
+
+@pytest.fixture
+def event_log_path(tmp_path: Path) -> Path:
+    return tmp_path / "events.jsonl"
+
+
+def close_event_log(application_state: ApplicationState) -> None:
+    assert application_state.event_log is not None
+    application_state.event_log.close()
+
+
+def test_replay_rebuilds_the_state(
+    event_log_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    application_state = ApplicationState()
+    application_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER)
+    application_state.create_room("room-1", "host-1")
+    application_state.create_room("room-2", "host-2")
+    application_state.join_room("room-1", "user-1")
+    application_state.join_room("room-1", "user-2")
+    room = application_state.rooms["room-1"]
+    room.set_session_status("user-1", UserStatus.RED)
+    room.add_question("user-1", "First")
+    room.add_question("user-1", "Second")
+    first, second = room.get_open_questions()
+    room.upvote_question("user-2", second.id)
+    room.close_question(first.id)
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    room.update_host_last_seen()
+    room.update_session("user-1")
+    application_state.remove_inactive_sessions(5)
+    application_state.remove_rooms_with_inactive_hosts(5)
+    assert application_state.get_session_room("host-2") is None
+    close_event_log(application_state)
+
+    replayed_state = ApplicationState()
+    assert replay_events(event_log_path, replayed_state) > 0
+    assert list(replayed_state.rooms) == ["room-1"]
+    assert replayed_state.get_session_room("user-2") is None
+    replayed_room = replayed_state.get_session_room("user-1")
+    assert replayed_room is not None
+    assert replayed_room.status_counts() == room.status_counts()
+    (question,) = replayed_room.get_open_questions()
+    assert (question.id, question.text, question.vote_count) == (second.id, "Second", 2)
+    assert replayed_room.has_voted("user-2", question)
+
+
+def test_events_of_removed_rooms_are_skipped(event_log_path: Path) -> None:
+    application_state = ApplicationState()
+    application_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER)
+    application_state.create_room("room-1", "host-1")
+    room = application_state.rooms["room-1"]
+    application_state.remove_room("room-1")
+    assert not application_state.remove_room("room-1")
+    room.add_question("host-1", "Asked in a stale view")
+    close_event_log(application_state)
+
+    replayed_state = ApplicationState()
+    assert replay_events(event_log_path, replayed_state) == 3
+    assert len(replayed_state.rooms) == 0
+
+
+def test_restart_replays_and_continues_the_log(event_log_path: Path) -> None:
+    application_state = ApplicationState()
+    assert (
+        application_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER) == 0
+    )
+    application_state.create_room("room-1", "host-1")
+    close_event_log(application_state)
+
+    restarted_state = ApplicationState()
+    assert restarted_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER) == 1
+    restarted_state.rooms["room-1"].add_question("host-1", "Question text")
+    close_event_log(restarted_state)
+
+    replayed_state = ApplicationState()
+    assert replay_events(event_log_path, replayed_state) == 2
+    assert len(replayed_state.rooms["room-1"].get_open_questions()) == 1
+
+
+def get_records(application_state: ApplicationState) -> dict[str, RoomRecord]:
+    return {room.room_id: room.to_record() for room in application_state.rooms.values()}
+
+
+def test_crash_after_snapshot_replays_only_later_events(
+    event_log_path: Path,
+    tmp_path: Path,
+) -> None:
+    snapshot_path = tmp_path / "snapshot.jsonl"
+    application_state = ApplicationState()
+    application_state.start_snapshots(str(snapshot_path), interval_seconds=3600)
+    application_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER)
+    application_state.create_room("room-1", "host-1")
+    application_state.join_room("room-1", "user-1")
+    room = application_state.rooms["room-1"]
+    room.add_question("user-1", "First")
+    room.add_question("user-1", "Second")
+    assert application_state.snapshot_scheduler is not None
+    application_state.snapshot_scheduler.stop()
+
+    # logged, but not in any snapshot when the process crashes
+    first, second = room.get_open_questions()
+    room.close_question(first.id)
+    room.upvote_question("user-2", second.id)
+    room.set_session_status("user-1", UserStatus.GREEN)
+    application_state.create_room("room-2", "host-2")
+    close_event_log(application_state)
+
+    restarted_state = ApplicationState()
+    assert restarted_state.start_snapshots(str(snapshot_path), 3600) == 1
+    assert restarted_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER) == 4
+    assert get_records(restarted_state) == get_records(application_state)
+    assert restarted_state.snapshot_scheduler is not None
+    restarted_state.snapshot_scheduler.stop()
+    close_event_log(restarted_state)
+
+    # events the snapshot contains already change nothing when replayed again
+    replayed_state = ApplicationState()
+    SnapshotLog(snapshot_path).restore(replayed_state)
+    assert replay_events(event_log_path, replayed_state) == 8
+    assert get_records(replayed_state) == get_records(application_state)
+
+
+def test_events_after_a_lost_end_of_the_log_are_replayed(
+    event_log_path: Path,
+    tmp_path: Path,
+) -> None:
+    snapshot_path = tmp_path / "snapshot.jsonl"
+    application_state = ApplicationState()
+    application_state.start_snapshots(str(snapshot_path), interval_seconds=3600)
+    application_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER)
+    application_state.create_room("room-1", "host-1")
+    application_state.join_room("room-1", "user-1")
+    assert application_state.snapshot_scheduler is not None
+    application_state.snapshot_scheduler.stop()
+    close_event_log(application_state)
+    # the join was in the snapshot, but never made it to the disk of the log
+    lines = event_log_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    event_log_path.write_text(lines[0], encoding="utf-8")
+
+    restarted_state = ApplicationState()
+    restarted_state.start_snapshots(str(snapshot_path), 3600)
+    assert restarted_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER) == 0
+    restarted_state.rooms["room-1"].add_question("user-1", "Question text")
+    # crashes before the next snapshot
+    close_event_log(restarted_state)
+
+    crashed_again_state = ApplicationState()
+    crashed_again_state.start_snapshots(str(snapshot_path), 3600)
+    crashed_again_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER)
+    assert len(crashed_again_state.rooms["room-1"].get_open_questions()) == 1
+    assert crashed_again_state.get_session_room("user-1") is not None
+    for state in (restarted_state, crashed_again_state):
+        assert state.snapshot_scheduler is not None
+        state.snapshot_scheduler.stop()
+    close_event_log(crashed_again_state)
+
+
+@pytest.mark.parametrize(
+    ("batching", "fsync_policy", "fsync_interval_seconds", "expect_fsync"),
+    [
+        (True, FsyncPolicy.ALWAYS, 1.0, True),
+        (False, FsyncPolicy.ALWAYS, 1.0, True),
+        (False, FsyncPolicy.INTERVAL, 0.0, True),
+        (False, FsyncPolicy.INTERVAL, 3600.0, False),
+        (True, FsyncPolicy.NEVER, 1.0, False),
+    ],
+)
+def test_all_appended_events_are_written(  # noqa: PLR0913
+    event_log_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    batching: bool,  # noqa: FBT001
+    fsync_policy: FsyncPolicy,
+    fsync_interval_seconds: float,
+    expect_fsync: bool,  # noqa: FBT001
+) -> None:
+    fsync_calls: list[int] = []
+    monkeypatch.setattr("lecture_feedback.event_log.os.fsync", fsync_calls.append)
+    event_log = EventLog(
+        event_log_path,
+        fsync_policy,
+        batching=batching,
+        fsync_interval_seconds=fsync_interval_seconds,
+    )
+
+    def append_events(writer_index: int) -> None:
+        for index in range(50):
+            event_log.append("test", writer_index=writer_index, index=index)
+
+    threads = [threading.Thread(target=append_events, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    event_log.flush()
+
+    assert len(event_log_path.read_text(encoding="utf-8").splitlines()) == 200
+    assert bool(fsync_calls) == expect_fsync
+    event_log.close()
+
+
+def test_context_replays_event_log_from_environment(
+    event_log_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    application_state = ApplicationState()
+    application_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER)
+    application_state.create_room("room-1", "host-1")
+    close_event_log(application_state)
+
+    Context._get_application_state.clear()  # noqa: SLF001
+    monkeypatch.setenv(EVENT_LOG_PATH_VARIABLE, str(event_log_path))
+    monkeypatch.setenv(EVENT_LOG_FSYNC_VARIABLE, "always")
+    restored_state = Context._get_application_state()  # noqa: SLF001
+    Context._get_application_state.clear()  # noqa: SLF001
+    assert isinstance(restored_state, ApplicationState)
+    assert "room-1" in restored_state.rooms
+    close_event_log(restored_state)
+
+
+def test_event_cut_short_by_a_crash_is_dropped(
+    event_log_path: Path,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    application_state = ApplicationState()
+    application_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER)
+    application_state.create_room("room-1", "host-1")
+    close_event_log(application_state)
+    with event_log_path.open("a", encoding="utf-8") as file:
+        file.write('{"type": "join_room", "room_')
+
+    restarted_state = ApplicationState()
+    assert restarted_state.start_event_log(str(event_log_path), FsyncPolicy.NEVER) == 1
+    assert "Dropping the incomplete end" in caplog.text
+    restarted_state.join_room("room-1", "user-1")
+    close_event_log(restarted_state)
+
+    replayed_state = ApplicationState()
+    assert replay_events(event_log_path, replayed_state) == 2
+    assert replayed_state.get_session_room("user-1") is not None
@@ -0,0 +1,46 @@
+import pytest
+
+from lecture_feedback.identity import (
+    SECRET_VARIABLE,
+    sign_session_id,
+    verify_session_cookie,
+    warn_if_secret_is_missing,
+)
+
+
+def test_signed_session_id_is_verified() -> None:
+    cookie = sign_session_id("session-1")
+
+    assert verify_session_cookie(cookie) == "session-1"
+
+
+@pytest.mark.parametrize(
+    "cookie",
+    [None, "", "session-1", ".signature", "session-1.forged-signature"],
+)
+def test_invalid_cookies_are_rejected(cookie: str | None) -> None:
+    assert verify_session_cookie(cookie) is None
+
+
+def test_cookies_are_only_valid_for_the_same_secret(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv(SECRET_VARIABLE, "first secret")
+    cookie = sign_session_id("session-1")
+    assert verify_session_cookie(cookie) == "session-1"
+
+    monkeypatch.setenv(SECRET_VARIABLE, "second secret")
+    assert verify_session_cookie(cookie) is None
+
+
+def test_missing_secret_is_warned_about(
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    monkeypatch.setenv(SECRET_VARIABLE, "secret")
+    warn_if_secret_is_missing()
+    assert not caplog.records
+
+    monkeypatch.delenv(SECRET_VARIABLE)
+    warn_if_secret_is_missing()
+    assert SECRET_VARIABLE in caplog.text
@@ -0,0 +1,30 @@
+import subprocess
+import sys
+
+# generous for slow CI machines, importing the app takes about 20 ms
+APP_IMPORT_BUDGET_MICROSECONDS = 250_000
+# only needed once a QR code is shown or the database is used
+DEFERRED_MODULES = ("qrcode", "lecture_feedback.sqlite_backend", "sqlite3")
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """Cumulative import time of every module imported by the statement."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_app_imports_within_budget() -> None:
+    # streamlit is imported first, its import time isn't ours to reduce
+    times = import_times("import streamlit; import lecture_feedback.app")
+
+    assert times["lecture_feedback.app"] < APP_IMPORT_BUDGET_MICROSECONDS
+    assert not [module for module in DEFERRED_MODULES if module in times]
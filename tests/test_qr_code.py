@@ -0,0 +1,49 @@
+import pytest
+
+from lecture_feedback.application_state import ApplicationState
+from lecture_feedback.qr_code import QrCodeCache, QrCodeFormat
+
+BASE_URL = "http://localhost:8501/"
+
+
+def test_png_and_svg_rendering() -> None:
+    qr_codes = QrCodeCache()
+    png = qr_codes.get(BASE_URL, "room-1", QrCodeFormat.PNG)
+    svg = qr_codes.get(BASE_URL, "room-1", QrCodeFormat.SVG)
+
+    assert isinstance(png, bytes)
+    assert png.startswith(b"\x89PNG")
+    assert isinstance(svg, str)
+    assert svg.startswith("<svg")
+
+
+def test_cached_image_is_reused() -> None:
+    qr_codes = QrCodeCache()
+    image = qr_codes.get(BASE_URL, "room-1", QrCodeFormat.PNG)
+    assert qr_codes.get(BASE_URL, "room-1", QrCodeFormat.PNG) is image
+    assert qr_codes.get("http://other/", "room-1", QrCodeFormat.PNG) is not image
+
+
+def test_least_recently_used_image_is_dropped() -> None:
+    qr_codes = QrCodeCache(max_size=2)
+    first = qr_codes.get(BASE_URL, "room-1", QrCodeFormat.SVG)
+    second = qr_codes.get(BASE_URL, "room-2", QrCodeFormat.SVG)
+    qr_codes.get(BASE_URL, "room-1", QrCodeFormat.SVG)
+    qr_codes.get(BASE_URL, "room-3", QrCodeFormat.SVG)
+
+    assert len(qr_codes) == 2
+    assert qr_codes.get(BASE_URL, "room-1", QrCodeFormat.SVG) is first
+    assert qr_codes.get(BASE_URL, "room-2", QrCodeFormat.SVG) is not second
+
+
+def test_removed_room_is_evicted(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    application_state = ApplicationState()
+    application_state.create_room("room-1", "host-1")
+    application_state.qr_codes.get(BASE_URL, "room-1", QrCodeFormat.SVG)
+    application_state.qr_codes.get(BASE_URL, "room-2", QrCodeFormat.SVG)
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    application_state.remove_rooms_with_inactive_hosts(5)
+
+    assert len(application_state.qr_codes) == 1
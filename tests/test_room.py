@@ -1,4 +1,7 @@
-from lecture_feedback.room import Room
+import pytest
+
+from lecture_feedback.room import Room, RoomPart
+from lecture_feedback.user_status import UserStatus
 
 
 def test_upvote_nonexistent_question_does_not_crash() -> None:
@@ -15,19 +18,20 @@ def test_user_cannot_vote_twice_on_same_question() -> None:
     question = questions[0]
 
     assert question.vote_count == 1
-    assert "creator-id" in question.voter_ids
+    assert room.has_voted("creator-id", question)
 
     room.upvote_question("user-2", question.id)
     questions = room.get_open_questions()
     question = questions[0]
     assert question.vote_count == 2
-    assert "user-2" in question.voter_ids
+    assert room.has_voted("user-2", question)
 
     room.upvote_question("user-2", question.id)
     questions = room.get_open_questions()
     question = questions[0]
     assert question.vote_count == 2  # Still 2, not 3
-    assert question.voter_ids == {"creator-id", "user-2"}
+    assert room.has_voted("creator-id", question)
+    assert room.has_voted("user-2", question)
 
 
 def test_creator_cannot_upvote_their_own_question() -> None:
@@ -45,7 +49,7 @@ def test_creator_cannot_upvote_their_own_question() -> None:
     questions = room.get_open_questions()
     question = questions[0]
     assert question.vote_count == initial_count
-    assert len(question.voter_ids) == 1
+    assert room.has_voted("creator-id", question)
 
 
 def test_multiple_users_can_upvote_same_question() -> None:
@@ -62,12 +66,11 @@ def test_multiple_users_can_upvote_same_question() -> None:
     questions = room.get_open_questions()
     question = questions[0]
     assert question.vote_count == 4
-    assert question.voter_ids == {
-        "creator-id",
-        "user-1",
-        "user-2",
-        "user-3",
-    }
+    assert all(
+        room.has_voted(session_id, question)
+        for session_id in ["creator-id", "user-1", "user-2", "user-3"]
+    )
+    assert not room.has_voted("user-4", question)
 
 
 def test_questions_sorted_by_vote_count() -> None:
@@ -91,3 +94,212 @@ def test_questions_sorted_by_vote_count() -> None:
     assert sorted_questions[0].vote_count == 3
     assert sorted_questions[1].vote_count == 2
     assert sorted_questions[2].vote_count == 1
+
+
+def test_status_counts_follow_status_changes() -> None:
+    room = Room("room-id", "host-id")
+    assert room.status_counts() == dict.fromkeys(UserStatus, 0)
+
+    room.add_session("user-1")
+    room.add_session("user-2")
+    room.set_session_status("user-1", UserStatus.RED)
+
+    assert room.status_counts() == {
+        UserStatus.UNKNOWN: 1,
+        UserStatus.GREEN: 0,
+        UserStatus.YELLOW: 0,
+        UserStatus.RED: 1,
+    }
+
+
+def test_status_counts_drop_removed_sessions(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    room = Room("room-id", "host-id")
+    room.add_session("user-1")
+    room.set_session_status("user-1", UserStatus.GREEN)
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    room.add_session("user-2")
+    room.set_session_status("user-2", UserStatus.GREEN)
+    room.remove_inactive_sessions(5)
+
+    assert room.status_counts()[UserStatus.GREEN] == 1
+
+
+def test_setting_the_same_status_only_marks_the_session_as_seen(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    room = Room("room-id", "host-id")
+    room.add_session("user-1")
+    assert room.set_session_status("user-1", UserStatus.GREEN)
+    statistics_version = room.get_version(RoomPart.STATISTICS)
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    assert not room.set_session_status("user-1", UserStatus.GREEN)
+    assert room.get_version(RoomPart.STATISTICS) == statistics_version
+    assert room.remove_inactive_sessions(5) == []
+    assert room.set_session_status("user-1", UserStatus.RED)
+    assert room.get_version(RoomPart.STATISTICS) == statistics_version + 1
+
+
+def test_versions_change_only_on_visible_changes(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    room = Room("room-id", "host-id")
+    versions = [{part: room.get_version(part) for part in RoomPart}]
+
+    def assert_changed_parts(*parts: RoomPart) -> None:
+        current = {part: room.get_version(part) for part in RoomPart}
+        changed = {part for part in RoomPart if current[part] != versions[-1][part]}
+        assert changed == set(parts)
+        versions.append(current)
+
+    room.add_session("user-1")
+    assert_changed_parts(RoomPart.STATISTICS)
+    room.set_session_status("user-1", UserStatus.UNKNOWN)
+    assert room.update_session("user-1")
+    assert not room.update_session("user-2")
+    room.update_host_last_seen()
+    assert_changed_parts()
+    room.set_session_status("user-1", UserStatus.GREEN)
+    assert_changed_parts(RoomPart.STATISTICS)
+
+    room.add_question("user-1", "Question text")
+    assert_changed_parts(RoomPart.QUESTIONS)
+    question = room.get_open_questions()[0]
+    room.upvote_question("user-1", question.id)
+    assert_changed_parts()
+    room.upvote_question("user-2", question.id)
+    assert_changed_parts(RoomPart.QUESTIONS)
+    room.close_question(question.id)
+    assert_changed_parts(RoomPart.QUESTIONS)
+
+    room.remove_inactive_sessions(5)
+    assert_changed_parts()
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    room.remove_inactive_sessions(5)
+    assert_changed_parts(RoomPart.STATISTICS)
+
+    room.sample_status_history()
+    assert_changed_parts(RoomPart.HISTORY)
+    room.sample_status_history()
+    assert_changed_parts()
+
+    room.close()
+    assert_changed_parts(RoomPart.METADATA)
+
+
+def test_questions_with_equal_votes_keep_submission_order() -> None:
+    room = Room("room-id", "host-id")
+    room.add_question("user-1", "First")
+    room.add_question("user-2", "Second")
+    room.add_question("user-3", "Third")
+
+    second = room.get_open_questions()[1]
+    room.upvote_question("user-4", second.id)
+    room.close_question(second.id)
+
+    assert [q.text for q in room.get_open_questions()] == ["First", "Third"]
+
+
+def test_open_questions_are_cached_until_questions_change() -> None:
+    room = Room("room-id", "host-id")
+    room.add_question("user-1", "Question text")
+
+    open_questions = room.get_open_questions()
+    assert room.get_open_questions() is open_questions
+
+    room.upvote_question("user-2", open_questions[0].id)
+    upvoted_questions = room.get_open_questions()
+    assert upvoted_questions is not open_questions
+    assert open_questions[0].vote_count == 1
+    assert upvoted_questions[0].vote_count == 2
+
+
+def test_snapshot_is_shared_until_the_room_changes() -> None:
+    room = Room("room-id", "host-id")
+    room.add_session("user-1")
+    room.set_session_status("user-1", UserStatus.GREEN)
+    room.add_question("user-1", "Question text")
+
+    snapshot = room.get_snapshot()
+    assert room.get_snapshot() is snapshot
+    assert snapshot.participant_count == 1
+    assert snapshot.status_counts[UserStatus.GREEN] == 1
+    assert [question.text for question in snapshot.open_questions] == [
+        "Question text",
+    ]
+
+    room.update_session("user-1")
+    assert room.get_snapshot() is snapshot
+    room.add_session("user-2")
+    changed_snapshot = room.get_snapshot()
+    assert changed_snapshot.participant_count == 2
+    assert snapshot.participant_count == 1
+
+
+def test_votes_of_removed_sessions_are_not_inherited(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    room = Room("room-id", "host-id")
+    room.add_session("user-1")
+    room.add_question("user-1", "Question text")
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    assert room.remove_inactive_sessions(5) == ["user-1"]
+    room.add_session("user-2")
+    room.upvote_question("user-2", room.get_open_questions()[0].id)
+
+    question = room.get_open_questions()[0]
+    assert question.vote_count == 2
+    assert room.has_voted("user-1", question)
+    assert room.has_voted("user-2", question)
+
+
+def test_closing_questions_frees_voter_indices_for_reuse() -> None:
+    room = Room("room-id", "host-id")
+    room.add_question("user-1", "First")
+    room.add_question("user-2", "Second")
+    first, second = room.get_open_questions()
+    room.upvote_question("user-3", second.id)
+    assert room.to_record()["participants"] == {"user-1": 0, "user-2": 1, "user-3": 2}
+
+    room.close_question(second.id)
+    assert room.to_record()["participants"] == {"user-1": 0}
+
+    room.upvote_question("user-4", first.id)
+    question = room.get_open_questions()[0]
+    assert question.voters == 0b11
+    assert room.has_voted("user-4", question)
+    assert not room.has_voted("user-2", question)
+
+
+def test_restored_room_reuses_free_voter_indices() -> None:
+    room = Room("room-id", "host-id")
+    for index in range(3):
+        room.add_question(f"user-{index}", f"Question {index}")
+    room.close_question(room.get_open_questions()[1].id)
+
+    restored_room = Room.from_record(room.to_record())
+    restored_room.add_question("user-3", "Question 3")
+    restored_room.add_question("user-4", "Question 4")
+    assert restored_room.to_record()["participants"] == {
+        "user-0": 0,
+        "user-2": 2,
+        "user-3": 1,
+        "user-4": 3,
+    }
+
+
+def test_closing_a_closed_question_does_nothing() -> None:
+    room = Room("room-id", "host-id")
+    room.add_question("user-1", "Question text")
+    question = room.get_open_questions()[0]
+    room.close_question(question.id)
+    questions_version = room.get_version(RoomPart.QUESTIONS)
+
+    room.close_question(question.id)
+    assert room.get_version(RoomPart.QUESTIONS) == questions_version
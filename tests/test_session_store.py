@@ -0,0 +1,75 @@
+from collections.abc import Callable
+
+import pytest
+
+from lecture_feedback.application_state import ApplicationState
+from lecture_feedback.columnar_sessions import ColumnarSessionStore
+from lecture_feedback.session_store import DictSessionStore, SessionStore
+from lecture_feedback.state_provider import SESSION_STORE_VARIABLE, Context
+from lecture_feedback.user_status import UserStatus
+
+STORE_FACTORIES: list[Callable[[], SessionStore]] = [
+    DictSessionStore,
+    lambda: ColumnarSessionStore(capacity=2),
+]
+
+
+@pytest.mark.parametrize("store_factory", STORE_FACTORIES)
+def test_store_tracks_statuses_and_counts(
+    store_factory: Callable[[], SessionStore],
+) -> None:
+    store = store_factory()
+    assert store.set_status("user-1", UserStatus.RED, 0) is None
+    assert store.set_status("user-2", UserStatus.RED, 0) is None
+    assert store.set_status("user-3", UserStatus.GREEN, 0) is None
+    assert store.set_status("user-1", UserStatus.GREEN, 1) is UserStatus.RED
+
+    assert store.get_status("user-1") is UserStatus.GREEN
+    assert "user-3" in store
+    assert sorted(store) == ["user-1", "user-2", "user-3"]
+    assert len(store) == 3
+    assert store.status_counts() == {
+        UserStatus.UNKNOWN: 0,
+        UserStatus.RED: 1,
+        UserStatus.YELLOW: 0,
+        UserStatus.GREEN: 2,
+    }
+    with pytest.raises(KeyError):
+        store.get_status("user-4")
+
+
+@pytest.mark.parametrize("store_factory", STORE_FACTORIES)
+def test_store_expires_and_removes_sessions(
+    store_factory: Callable[[], SessionStore],
+) -> None:
+    store = store_factory()
+    for index in range(4):
+        store.set_status(f"user-{index}", UserStatus.YELLOW, 0)
+    store.touch("user-0", 10)
+    store.touch("unknown-user", 10)
+
+    assert sorted(store.pop_expired(5)) == ["user-1", "user-2", "user-3"]
+    assert store.pop_expired(5) == []
+    store.remove(["user-0"])
+    assert len(store) == 0
+    assert store.status_counts()[UserStatus.YELLOW] == 0
+
+    # removed sessions can come back, e.g. after a reconnect
+    assert store.set_status("user-1", UserStatus.RED, 20) is None
+    assert store.status_counts()[UserStatus.RED] == 1
+
+
+def test_context_uses_columnar_store_from_environment(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    Context._get_application_state.clear()  # noqa: SLF001
+    monkeypatch.setenv(SESSION_STORE_VARIABLE, "columnar")
+    application_state = Context._get_application_state()  # noqa: SLF001
+    Context._get_application_state.clear()  # noqa: SLF001
+    assert isinstance(application_state, ApplicationState)
+
+    application_state.create_room("room-1", "host-1")
+    application_state.join_room("room-1", "user-1")
+    room = application_state.rooms["room-1"]
+    assert isinstance(room._sessions, ColumnarSessionStore)  # noqa: SLF001
+    assert room.status_counts()[UserStatus.UNKNOWN] == 1
@@ -0,0 +1,234 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from lecture_feedback.application_state import ApplicationState
+from lecture_feedback.event_log import FsyncPolicy
+from lecture_feedback.snapshot_log import SnapshotLog, SnapshotScheduler
+from lecture_feedback.state_provider import SNAPSHOT_PATH_VARIABLE, Context
+from lecture_feedback.user_status import UserStatus
+
+
+@pytest.fixture
+def snapshot_path(tmp_path: Path) -> Path:
+    return tmp_path / "snapshot.jsonl"
+
+
+def create_lecture(application_state: ApplicationState, room_id: str) -> None:
+    application_state.create_room(room_id, f"host-{room_id}")
+    application_state.join_room(room_id, f"user-{room_id}")
+    room = application_state.rooms[room_id]
+    room.set_session_status(f"user-{room_id}", UserStatus.RED)
+    room.add_question(f"user-{room_id}", "First")
+    room.add_question(f"other-{room_id}", "Second")
+    room.upvote_question(f"user-{room_id}", room.get_open_questions()[1].id)
+
+
+def restore(snapshot_path: Path) -> ApplicationState:
+    application_state = ApplicationState()
+    SnapshotLog(snapshot_path).restore(application_state)
+    return application_state
+
+
+def test_restored_rooms_keep_sessions_questions_and_votes(
+    snapshot_path: Path,
+) -> None:
+    application_state = ApplicationState()
+    create_lecture(application_state, "room-1")
+    SnapshotLog(snapshot_path).write(application_state)
+
+    restored_state = restore(snapshot_path)
+    room = restored_state.get_session_room("user-room-1")
+    assert room is not None
+    assert restored_state.get_session_room("host-room-1") is room
+    assert room.get_session_status("user-room-1") == UserStatus.RED
+    first, second = room.get_open_questions()
+    assert (first.text, first.vote_count) == ("Second", 2)
+    assert (second.text, second.vote_count) == ("First", 1)
+    assert room.has_voted("user-room-1", first)
+
+    room.upvote_question("new-user", second.id)
+    assert not room.has_voted("new-user", first)
+    assert room.get_open_questions()[1].vote_count == 2
+
+
+# whether or not the newline of the torn line made it to the disk
+@pytest.mark.parametrize(
+    "torn_line",
+    ['{"room_id": "room-2", "host_', '{"room_id": "room-2", "host_\n'],
+)
+def test_append_cut_short_by_a_crash_is_dropped(
+    snapshot_path: Path,
+    caplog: pytest.LogCaptureFixture,
+    torn_line: str,
+) -> None:
+    application_state = ApplicationState()
+    create_lecture(application_state, "room-1")
+    SnapshotLog(snapshot_path).write(application_state)
+    complete_size = snapshot_path.stat().st_size
+    with snapshot_path.open("a", encoding="utf-8") as file:
+        file.write(torn_line)
+
+    restored_state = ApplicationState()
+    snapshot_log = SnapshotLog(snapshot_path)
+    assert snapshot_log.restore(restored_state) == 1
+    assert "Dropping the incomplete end" in caplog.text
+    assert snapshot_path.stat().st_size == complete_size
+
+    create_lecture(restored_state, "room-2")
+    snapshot_log.write(restored_state)
+    assert set(restore(snapshot_path).rooms) == {"room-1", "room-2"}
+
+
+def test_only_changed_and_removed_rooms_are_appended(
+    snapshot_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 0)
+    application_state = ApplicationState()
+    create_lecture(application_state, "room-1")
+    create_lecture(application_state, "room-2")
+    snapshot_log = SnapshotLog(snapshot_path)
+    assert snapshot_log.write(application_state) == 2
+    assert snapshot_log.write(application_state) == 0
+
+    application_state.rooms["room-1"].add_question("user-room-1", "Third")
+    assert snapshot_log.write(application_state) == 1
+
+    monkeypatch.setattr("lecture_feedback.room.time.time", lambda: 10)
+    application_state.rooms["room-1"].update_host_last_seen()
+    application_state.remove_rooms_with_inactive_hosts(5)
+    assert snapshot_log.write(application_state) == 1
+
+    restored_state = restore(snapshot_path)
+    assert list(restored_state.rooms) == ["room-1"]
+    assert len(restored_state.rooms["room-1"].get_open_questions()) == 3
+
+
+def test_log_is_compacted_once_mostly_outdated(
+    snapshot_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        "lecture_feedback.snapshot_log.MIN_RECORDS_BEFORE_COMPACTION",
+        0,
+    )
+    application_state = ApplicationState()
+    create_lecture(application_state, "room-1")
+    snapshot_log = SnapshotLog(snapshot_path)
+    for index in range(5):
+        application_state.rooms["room-1"].add_question("user-room-1", f"{index}")
+        snapshot_log.write(application_state)
+
+    assert len(snapshot_path.read_text(encoding="utf-8").splitlines()) <= 4
+    restored_state = restore(snapshot_path)
+    assert len(restored_state.rooms["room-1"].get_open_questions()) == 7
+
+
+def test_restore_continues_the_log(snapshot_path: Path) -> None:
+    assert SnapshotLog(snapshot_path).restore(ApplicationState()) == 0
+
+    application_state = ApplicationState()
+    create_lecture(application_state, "room-1")
+    SnapshotLog(snapshot_path).write(application_state)
+
+    restored_state = ApplicationState()
+    snapshot_log = SnapshotLog(snapshot_path)
+    assert snapshot_log.restore(restored_state) == 1
+    assert snapshot_log.write(restored_state) == 0
+
+
+def test_compaction_keeps_the_event_count(snapshot_path: Path, tmp_path: Path) -> None:
+    application_state = ApplicationState()
+    application_state.start_event_log(str(tmp_path / "events.jsonl"), FsyncPolicy.NEVER)
+    assert application_state.event_log is not None
+    create_lecture(application_state, "room-1")
+    SnapshotLog(snapshot_path).compact(application_state)
+    event_count = application_state.event_log.written_count
+    application_state.event_log.close()
+
+    # e.g. compacted while the events after the count are replayed
+    restored_state = ApplicationState()
+    snapshot_log = SnapshotLog(snapshot_path)
+    snapshot_log.restore(restored_state)
+    assert snapshot_log.event_count == event_count
+    snapshot_log.compact(restored_state)
+
+    snapshot_log = SnapshotLog(snapshot_path)
+    snapshot_log.restore(ApplicationState())
+    assert snapshot_log.event_count == event_count
+
+
+def test_context_restores_and_writes_snapshots(
+    snapshot_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    application_state = ApplicationState()
+    create_lecture(application_state, "room-1")
+    SnapshotLog(snapshot_path).write(application_state)
+
+    Context._get_application_state.clear()  # noqa: SLF001
+    monkeypatch.setenv(SNAPSHOT_PATH_VARIABLE, str(snapshot_path))
+    restored_state = Context._get_application_state()  # noqa: SLF001
+    Context._get_application_state.clear()  # noqa: SLF001
+    assert isinstance(restored_state, ApplicationState)
+    assert "room-1" in restored_state.rooms
+
+    create_lecture(restored_state, "room-2")
+    assert restored_state.snapshot_scheduler is not None
+    restored_state.snapshot_scheduler.stop()
+    assert set(restore(snapshot_path).rooms) == {"room-1", "room-2"}
+
+
+def test_scheduler_writes_in_background(snapshot_path: Path) -> None:
+    application_state = ApplicationState()
+    create_lecture(application_state, "room-1")
+    snapshot_scheduler = SnapshotScheduler(
+        application_state,
+        SnapshotLog(snapshot_path),
+        interval_seconds=0.01,
+    )
+    snapshot_scheduler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not snapshot_path.exists():
+            assert time.monotonic() < deadline, "No snapshot written in time"
+            time.sleep(0.01)
+    finally:
+        snapshot_scheduler.stop()
+
+
+def test_scheduler_keeps_writing_after_a_failed_write(
+    snapshot_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    application_state = ApplicationState()
+    create_lecture(application_state, "room-1")
+    snapshot_log = SnapshotLog(snapshot_path)
+    write = snapshot_log.write
+    calls = []
+
+    def fail_once(application_state: ApplicationState) -> int:
+        calls.append(application_state)
+        if len(calls) == 1:
+            raise OSError
+        return write(application_state)
+
+    monkeypatch.setattr(snapshot_log, "write", fail_once)
+    snapshot_scheduler = SnapshotScheduler(
+        application_state,
+        snapshot_log,
+        interval_seconds=0.01,
+    )
+    snapshot_scheduler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not snapshot_path.exists():
+            assert time.monotonic() < deadline, "No snapshot after the failure"
+            time.sleep(0.01)
+    finally:
+        snapshot_scheduler.stop()
+
+    assert "Periodic task of snapshot-scheduler failed" in caplog.text
@@ -0,0 +1,290 @@
+import threading
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+
+from lecture_feedback.application_state import ApplicationState
+from lecture_feedback.room import STATUS_HISTORY_INTERVAL_SECONDS, RoomPart
+from lecture_feedback.sqlite_backend import SqliteRoom, SqliteStateBackend
+from lecture_feedback.state_provider import DATABASE_PATH_VARIABLE, Context
+from lecture_feedback.user_status import UserStatus
+
+
+@pytest.fixture
+def database_path(tmp_path: Path) -> Path:
+    return tmp_path / "state.db"
+
+
+@pytest.fixture
+def open_backend(database_path: Path) -> Iterator[Callable[[], SqliteStateBackend]]:
+    backends: list[SqliteStateBackend] = []
+
+    def open_backend() -> SqliteStateBackend:
+        backend = SqliteStateBackend(database_path)
+        backends.append(backend)
+        return backend
+
+    yield open_backend
+    for backend in backends:
+        backend.close()
+
+
+def get_room(backend: SqliteStateBackend, session_id: str) -> SqliteRoom:
+    room = backend.get_session_room(session_id)
+    assert room is not None
+    return room
+
+
+def test_workers_share_rooms_through_the_database(
+    open_backend: Callable[[], SqliteStateBackend],
+) -> None:
+    worker_1 = open_backend()
+    worker_2 = open_backend()
+    worker_1.create_room("room-1", "host-1")
+    worker_2.join_room("room-1", "user-1")
+
+    host_room = get_room(worker_1, "host-1")
+    user_room = get_room(worker_2, "user-1")
+    assert host_room.room_id == user_room.room_id == "room-1"
+    assert host_room.is_host("host-1")
+    assert not user_room.is_host("user-1")
+    assert worker_1.get_session_room("unknown-id") is None
+
+    user_room.set_session_status("user-1", UserStatus.RED)
+    assert host_room.status_counts()[UserStatus.RED] == 1
+    assert host_room.get_session_status("user-1") == UserStatus.RED
+    with pytest.raises(KeyError):
+        host_room.get_session_status("unknown-id")
+
+
+def test_join_nonexistent_room_does_not_register_session(
+    open_backend: Callable[[], SqliteStateBackend],
+) -> None:
+    backend = open_backend()
+    with pytest.raises(ValueError, match="does not exist"):
+        backend.join_room("room-1", "user-1")
+    assert backend.get_session_room("user-1") is None
+
+
+def test_questions_are_ranked_and_voted_once(
+    open_backend: Callable[[], SqliteStateBackend],
+) -> None:
+    backend = open_backend()
+    backend.create_room("room-1", "host-1")
+    room = get_room(backend, "host-1")
+    room.add_question("user-1", "First")
+    room.add_question("user-2", "Second")
+    first, second = room.get_open_questions()
+
+    room.upvote_question("user-3", second.id)
+    room.upvote_question("user-3", second.id)
+    room.upvote_question("user-3", "nonexistent-question-id")
+
+    assert [question.text for question in room.get_open_questions()] == [
+        "Second",
+        "First",
+    ]
+    assert room.get_open_questions()[0].vote_count == 2
+    assert room.has_voted("user-3", second)
+    assert not room.has_voted("user-3", first)
+    assert len(room.get_open_questions()) == 2
+
+    room.close_question(second.id)
+    assert len(room.get_open_questions()) == 1
+
+
+def test_questions_are_only_changed_through_their_room(
+    open_backend: Callable[[], SqliteStateBackend],
+) -> None:
+    backend = open_backend()
+    backend.create_room("room-1", "host-1")
+    backend.create_room("room-2", "host-2")
+    room_1 = get_room(backend, "host-1")
+    room_2 = get_room(backend, "host-2")
+    room_2.add_question("user-1", "Question text")
+    question = room_2.get_open_questions()[0]
+    questions_version = room_1.get_version(RoomPart.QUESTIONS)
+
+    room_1.upvote_question("user-2", question.id)
+    room_1.close_question(question.id)
+    assert room_2.get_open_questions()[0].vote_count == 1
+    assert room_1.get_version(RoomPart.QUESTIONS) == questions_version
+
+    room_2.close_question(question.id)
+    questions_version = room_2.get_version(RoomPart.QUESTIONS)
+    room_2.close_question(question.id)
+    assert room_2.get_version(RoomPart.QUESTIONS) == questions_version
+
+
+def test_versions_change_only_on_visible_changes(
+    open_backend: Callable[[], SqliteStateBackend],
+) -> None:
+    backend = open_backend()
+    backend.create_room("room-1", "host-1")
+    backend.join_room("room-1", "user-1")
+    room = get_room(backend, "user-1")
+    statistics_version = room.get_version(RoomPart.STATISTICS)
+    questions_version = room.get_version(RoomPart.QUESTIONS)
+
+    assert room.update_session("user-1")
+    assert not room.update_session("user-2")
+    assert not room.set_session_status("user-1", UserStatus.UNKNOWN)
+    assert room.get_version(RoomPart.STATISTICS) == statistics_version
+    assert room.set_session_status("user-1", UserStatus.GREEN)
+    assert room.get_version(RoomPart.STATISTICS) == statistics_version + 1
+
+    room.add_question("user-1", "Question text")
+    assert room.get_version(RoomPart.QUESTIONS) == questions_version + 1
+
+
+def test_status_history_is_sampled_once_per_interval_by_all_workers(
+    open_backend: Callable[[], SqliteStateBackend],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    worker_1 = open_backend()
+    worker_2 = open_backend()
+    monkeypatch.setattr("lecture_feedback.sqlite_backend.time.time", lambda: 0)
+    worker_1.create_room("room-1", "host-1")
+    worker_1.join_room("room-1", "user-1")
+    room = get_room(worker_1, "user-1")
+    room.set_session_status("user-1", UserStatus.GREEN)
+    assert room.get_status_history() == ()
+
+    worker_1.sample_status_histories()
+    history_version = room.get_version(RoomPart.HISTORY)
+    monkeypatch.setattr(
+        "lecture_feedback.sqlite_backend.time.time",
+        lambda: STATUS_HISTORY_INTERVAL_SECONDS - 1,
+    )
+    worker_2.sample_status_histories()
+    assert room.get_version(RoomPart.HISTORY) == history_version
+
+    monkeypatch.setattr(
+        "lecture_feedback.sqlite_backend.time.time",
+        lambda: STATUS_HISTORY_INTERVAL_SECONDS,
+    )
+    room.set_session_status("user-1", UserStatus.RED)
+    worker_2.sample_status_histories()
+    assert room.get_version(RoomPart.HISTORY) > history_version
+    first, second = room.get_status_history()
+    assert (first.timestamp, second.timestamp) == (0, STATUS_HISTORY_INTERVAL_SECONDS)
+    assert (first.counts[UserStatus.GREEN], first.counts[UserStatus.RED]) == (1, 0)
+    assert (second.counts[UserStatus.GREEN], second.counts[UserStatus.RED]) == (0, 1)
+
+
+def test_stale_view_does_not_bring_back_removed_session(
+    open_backend: Callable[[], SqliteStateBackend],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    backend = open_backend()
+    monkeypatch.setattr("lecture_feedback.sqlite_backend.time.time", lambda: 0)
+    backend.create_room("room-1", "host-1")
+    backend.join_room("room-1", "user-1")
+    room = get_room(backend, "user-1")
+
+    monkeypatch.setattr("lecture_feedback.sqlite_backend.time.time", lambda: 10)
+    assert backend.remove_inactive_sessions(5) == 1
+    assert not room.set_session_status("user-1", UserStatus.GREEN)
+    assert backend.get_session_room("user-1") is None
+
+
+def test_inactive_sessions_and_rooms_are_removed(
+    open_backend: Callable[[], SqliteStateBackend],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("lecture_feedback.sqlite_backend.time.time", lambda: 0)
+    backend = open_backend()
+    backend.create_room("room-1", "host-1")
+    backend.join_room("room-1", "user-1")
+    backend.create_room("room-2", "host-2")
+    backend.join_room("room-2", "user-2")
+    room_1 = get_room(backend, "host-1")
+    room_1.add_question("user-1", "Question text")
+    metadata_version = room_1.get_version(RoomPart.METADATA)
+
+    monkeypatch.setattr("lecture_feedback.sqlite_backend.time.time", lambda: 10)
+    get_room(backend, "host-2").update_host_last_seen()
+    backend.join_room("room-2", "user-3")
+    assert backend.remove_inactive_sessions(5) == 2
+    assert backend.remove_rooms_with_inactive_hosts(5) == 1
+
+    assert backend.get_session_room("host-1") is None
+    assert backend.get_session_room("user-2") is None
+    assert backend.get_session_room("user-3") is not None
+    assert room_1.get_version(RoomPart.METADATA) != metadata_version
+    assert backend.execute("SELECT COUNT(*) FROM votes").fetchone() == (0,)
+
+
+def test_snapshot_is_shared_by_all_views_of_the_room(
+    open_backend: Callable[[], SqliteStateBackend],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    backend = open_backend()
+    backend.create_room("room-1", "host-1")
+    backend.join_room("room-1", "user-1")
+    snapshot = get_room(backend, "host-1").get_snapshot()
+    assert get_room(backend, "user-1").get_snapshot() is snapshot
+    assert snapshot.participant_count == 1
+
+    get_room(backend, "user-1").add_question("user-1", "Question text")
+    (question,) = get_room(backend, "host-1").get_snapshot().open_questions
+    assert question.text == "Question text"
+
+    room = get_room(backend, "host-1")
+    monkeypatch.setattr("lecture_feedback.sqlite_backend.time.time", lambda: 1e12)
+    assert backend.remove_rooms_with_inactive_hosts(5) == 1
+    assert "room-1" not in backend.snapshots
+    assert room.get_snapshot().versions == (-1, -1)
+
+
+def test_concurrent_writers_use_own_connections(
+    open_backend: Callable[[], SqliteStateBackend],
+) -> None:
+    backend = open_backend()
+    backend.create_room("room-1", "host-1")
+    room = get_room(backend, "host-1")
+
+    def submit_questions(session_id: str) -> None:
+        for index in range(20):
+            room.add_question(session_id, f"Question {index}")
+
+    threads = [
+        threading.Thread(target=submit_questions, args=(f"user-{index}",))
+        for index in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(room.get_open_questions()) == 80
+
+
+def test_cleanup_scheduler_is_started_only_once(
+    open_backend: Callable[[], SqliteStateBackend],
+) -> None:
+    backend = open_backend()
+    backend.start_cleanup_scheduler(60, 60)
+    cleanup_scheduler = backend.cleanup_scheduler
+    assert cleanup_scheduler is not None
+
+    backend.start_cleanup_scheduler(60, 60)
+    assert backend.cleanup_scheduler is cleanup_scheduler
+    cleanup_scheduler.stop()
+
+
+def test_context_uses_database_from_environment(
+    database_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    Context._get_application_state.clear()  # noqa: SLF001
+    monkeypatch.setenv(DATABASE_PATH_VARIABLE, str(database_path))
+    backend = Context._get_application_state()  # noqa: SLF001
+    assert isinstance(backend, SqliteStateBackend)
+    backend.close()
+
+    Context._get_application_state.clear()  # noqa: SLF001
+    monkeypatch.delenv(DATABASE_PATH_VARIABLE)
+    assert isinstance(Context._get_application_state(), ApplicationState)  # noqa: SLF001
+    Context._get_application_state.clear()  # noqa: SLF001
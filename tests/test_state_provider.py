@@ -0,0 +1,21 @@
+from lecture_feedback.qr_code import QrCodeCache
+from lecture_feedback.room import Room
+from lecture_feedback.state_provider import ClientState
+
+
+def test_open_questions_can_be_paginated() -> None:
+    room = Room("room-id", "host-id")
+    room.add_session("user-0")
+    for index in range(5):
+        room.add_question(f"user-{index}", f"Question {index}")
+    client_state = ClientState(room, "user-0", QrCodeCache())
+
+    assert client_state.count_open_questions() == 5
+    assert [q.text for q in client_state.get_open_questions(limit=2)] == [
+        "Question 0",
+        "Question 1",
+    ]
+    assert [q.text for q in client_state.get_open_questions(limit=2, offset=4)] == [
+        "Question 4",
+    ]
+    assert len(client_state.get_open_questions(offset=1)) == 4
@@ -0,0 +1,57 @@
+import pytest
+
+from lecture_feedback.status_history import StatusHistory
+from lecture_feedback.user_status import UserStatus
+
+
+def counts(green: int) -> dict[UserStatus, int]:
+    return {status: green if status is UserStatus.GREEN else 0 for status in UserStatus}
+
+
+def test_samples_are_taken_at_most_once_per_interval() -> None:
+    history = StatusHistory(10)
+    assert history.record(0, counts(1))
+    assert not history.record(5, counts(2))
+    assert history.record(10, counts(3))
+
+    assert len(history) == 2
+    first, second = history.samples()
+    assert (first.timestamp, first.counts[UserStatus.GREEN]) == (0, 1)
+    assert (second.timestamp, second.counts[UserStatus.GREEN]) == (10, 3)
+    assert second.counts[UserStatus.RED] == 0
+
+
+def test_full_history_merges_samples_and_halves_the_sample_rate() -> None:
+    history = StatusHistory(10, capacity=4)
+    for index in range(4):
+        assert history.record(index * 10, counts(index))
+
+    assert history.record(40, counts(4))
+    assert [sample.timestamp for sample in history.samples()] == [0, 20, 40]
+    assert [sample.counts[UserStatus.GREEN] for sample in history.samples()] == [
+        pytest.approx(0.5),
+        pytest.approx(2.5),
+        4,
+    ]
+    # samples are taken every 20 seconds now
+    assert not history.record(50, counts(5))
+    assert history.record(60, counts(6))
+    assert len(history) == 4
+
+
+def test_odd_capacity_keeps_the_last_sample_when_merging() -> None:
+    history = StatusHistory(1, capacity=3)
+    for index in range(4):
+        assert history.record(index, counts(index))
+
+    assert [sample.timestamp for sample in history.samples()] == [0, 2, 3]
+    assert [sample.counts[UserStatus.GREEN] for sample in history.samples()] == [
+        pytest.approx(0.5),
+        2,
+        3,
+    ]
+
+
+def test_history_needs_room_for_two_samples() -> None:
+    with pytest.raises(ValueError, match="at least two samples"):
+        StatusHistory(10, capacity=1)
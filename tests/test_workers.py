@@ -0,0 +1,58 @@
+import pytest
+
+from lecture_feedback.workers import (
+    PUBLIC_URL_VARIABLE,
+    WORKER_COUNT_VARIABLE,
+    WORKER_ID_VARIABLE,
+    WorkerRouter,
+    get_other_worker_join_url,
+    get_public_url,
+    get_worker_index,
+    new_room_id,
+)
+
+
+def test_room_ids_are_prefixed_with_worker_id(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(WORKER_ID_VARIABLE, raising=False)
+    assert get_worker_index(new_room_id(), 4) is None
+
+    monkeypatch.setenv(WORKER_ID_VARIABLE, "2")
+    room_id = new_room_id()
+    assert room_id.startswith("2.")
+    assert get_worker_index(room_id, 4) == 2
+    assert get_worker_index(room_id, 2) is None
+    assert get_worker_index("x.room", 4) is None
+
+
+def test_public_url_comes_from_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(PUBLIC_URL_VARIABLE, raising=False)
+    assert get_public_url() is None
+
+    monkeypatch.setenv(PUBLIC_URL_VARIABLE, "http://router/")
+    assert get_public_url() == "http://router/"
+
+
+def test_router_sends_rooms_to_their_worker() -> None:
+    router = WorkerRouter(["http://worker-0/", "http://worker-1/"])
+
+    assert router.route("/?room_id=1.abc") == "http://worker-1/?room_id=1.abc"
+    assert router.route("/?room_id=0.abc") == "http://worker-0/?room_id=0.abc"
+    assert [router.route("/"), router.route("/?room_id=abc")] == [
+        "http://worker-0/",
+        "http://worker-1/?room_id=abc",
+    ]
+
+
+def test_rooms_of_other_workers_are_joined_through_router(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.delenv(WORKER_ID_VARIABLE, raising=False)
+    assert get_other_worker_join_url("1.abc") is None
+
+    monkeypatch.setenv(WORKER_ID_VARIABLE, "0")
+    monkeypatch.setenv(WORKER_COUNT_VARIABLE, "2")
+    monkeypatch.setenv(PUBLIC_URL_VARIABLE, "http://router/")
+    assert get_other_worker_join_url("1.abc") == "http://router/?room_id=1.abc"
+    assert get_other_worker_join_url("0.abc") is None
+    # unknown workers can't own the room, the router would send it anywhere
+    assert get_other_worker_join_url("2.abc") is None
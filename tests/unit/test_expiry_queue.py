@@ -0,0 +1,23 @@
+from lecture_feedback.expiry_queue import ExpiryQueue
+
+
+def test_pop_expired_returns_keys_seen_before_deadline_in_order() -> None:
+    expiry_queue = ExpiryQueue()
+    expiry_queue.touch("a", 1)
+    expiry_queue.touch("b", 2)
+    expiry_queue.touch("c", 3)
+
+    assert expiry_queue.pop_expired(3) == ["a", "b"]
+    assert len(expiry_queue) == 1
+    assert expiry_queue.pop_expired(3) == []
+
+
+def test_touch_reschedules_key() -> None:
+    expiry_queue = ExpiryQueue()
+    expiry_queue.touch("a", 1)
+    expiry_queue.touch("b", 2)
+    expiry_queue.touch("a", 5)
+
+    assert expiry_queue.pop_expired(4) == ["b"]
+    assert expiry_queue.pop_expired(6) == ["a"]
+    assert len(expiry_queue) == 0
@@ -2,12 +2,19 @@ from typing import Any
 
 import pytest
 
-from lecture_feedback.thread_safe_dict import ThreadSafeDict
+from lecture_feedback.thread_safe_dict import (
+    CopyOnWriteDict,
+    ShardedDict,
+    ThreadSafeDict,
+)
 
 
-def test_basic_operations() -> None:
+@pytest.mark.parametrize("dict_class", [ThreadSafeDict, CopyOnWriteDict])
+def test_basic_operations(
+    dict_class: type[ThreadSafeDict[Any] | CopyOnWriteDict[Any]],
+) -> None:
     # Create a thread-safe dict
-    thread_safe_dict: ThreadSafeDict[Any] = ThreadSafeDict()
+    thread_safe_dict = dict_class()
 
     # Test setting and getting values
     thread_safe_dict["key1"] = "value1"
@@ -16,6 +23,9 @@ def test_basic_operations() -> None:
     assert thread_safe_dict["key1"] == "value1"
     assert thread_safe_dict["key2"]["nested"] == "dict"
     assert "key1" in thread_safe_dict
+    assert thread_safe_dict.get("key1") == "value1"
+    assert thread_safe_dict.get("missing") is None
+    assert len(thread_safe_dict) == 2
 
     # Test copy
     copy_dict = thread_safe_dict.copy()
@@ -49,3 +59,63 @@ def test_basic_operations() -> None:
         current = thread_safe_dict["counter"]
         thread_safe_dict["counter"] = current + 1
     assert thread_safe_dict["counter"] == 1
+
+
+def test_copy_on_write_readers_keep_their_snapshot() -> None:
+    copy_on_write_dict: CopyOnWriteDict[int] = CopyOnWriteDict(a=1, b=2)
+
+    values = copy_on_write_dict.values()
+    keys = iter(copy_on_write_dict)
+    copy_on_write_dict["c"] = 3
+    del copy_on_write_dict["a"]
+
+    assert sorted(values) == [1, 2]
+    assert list(keys) == ["a", "b"]
+    assert dict(copy_on_write_dict.items()) == {"b": 2, "c": 3}
+
+
+def test_sharded_dict_operations() -> None:
+    sharded_dict: ShardedDict[int] = ShardedDict(shard_count=4)
+    for index in range(20):
+        sharded_dict[f"key-{index}"] = index
+
+    assert len(sharded_dict.shards) == 4
+    assert sum(len(shard) > 0 for shard in sharded_dict.shards) > 1
+    assert len(sharded_dict) == 20
+    assert sharded_dict["key-3"] == 3
+    assert sharded_dict.get("key-4") == 4
+    assert sharded_dict.get("missing") is None
+    assert "key-5" in sharded_dict
+    assert sorted(sharded_dict.values()) == list(range(20))
+    assert len(set(sharded_dict)) == 20
+
+    with sharded_dict.shard("key-5") as shard:
+        assert shard["key-5"] == 5
+        del sharded_dict["key-5"]
+    assert "key-5" not in sharded_dict
+
+
+def test_update_adds_all_entries() -> None:
+    thread_safe_dict: ThreadSafeDict[int] = ThreadSafeDict({"a": 1})
+    copy_on_write_dict: CopyOnWriteDict[int] = CopyOnWriteDict({"a": 1})
+    sharded_dict: ShardedDict[int] = ShardedDict(shard_count=4)
+    sharded_dict["a"] = 1
+    published = dict(copy_on_write_dict.items())
+
+    entries = {f"key-{index}": index for index in range(10)}
+    thread_safe_dict.update(entries)
+    copy_on_write_dict.update(entries)
+    sharded_dict.update(entries)
+
+    assert len(thread_safe_dict) == len(copy_on_write_dict) == len(sharded_dict) == 11
+    assert thread_safe_dict["key-9"] == copy_on_write_dict["key-9"] == 9
+    assert sharded_dict["key-9"] == 9
+    assert published == {"a": 1}
+
+
+def test_pop_removes_and_returns_the_entry() -> None:
+    thread_safe_dict: ThreadSafeDict[int] = ThreadSafeDict({"a": 1})
+
+    assert thread_safe_dict.pop("a") == 1
+    assert thread_safe_dict.pop("a") is None
+    assert len(thread_safe_dict) == 0